@@ -0,0 +1,107 @@
+# actions.py
+"""Validated game actions.
+
+Actions are built against the current board by plan_move / plan_attack or
+listed by legal_actions, and carry everything needed to carry them out:
+a move knows its destination, cost and route (from the unit's cached
+reachability search), an attack its target. GameState.apply() performs
+them without searching again, so input handling, the AIs and anything
+else that produces moves share one cheap action stream.
+"""
+
+
+class MoveAction:
+    """Move unit to (x, y) for cost move points along a precomputed route."""
+    __slots__ = ('unit', 'x', 'y', 'cost', '_reachability', '_path')
+
+    def __init__(self, unit, x, y, cost, reachability=None, path=None):
+        self.unit = unit
+        self.x = x
+        self.y = y
+        self.cost = cost
+        self._reachability = reachability
+        self._path = path
+
+    @property
+    def path(self):
+        """The (x, y) steps from the unit's cell (exclusive) to the destination."""
+        if self._path is None and self._reachability is not None:
+            # Read back from the search that validated the move, no new search
+            self._path = self._reachability.path_to(self.x, self.y)
+        return self._path
+
+    def apply(self, game_state):
+        return game_state.move_unit(self.unit, self.x, self.y, self.cost)
+
+    def __repr__(self):
+        return f"MoveAction({self.unit.unit_type} -> ({self.x}, {self.y}), cost {self.cost})"
+
+
+class AttackAction:
+    """Have unit attack target, which was in range when the action was made."""
+    __slots__ = ('unit', 'target')
+
+    def __init__(self, unit, target):
+        self.unit = unit
+        self.target = target
+
+    def apply(self, game_state):
+        return game_state.resolve_attack(self.unit, self.target)
+
+    def __repr__(self):
+        return f"AttackAction({self.unit.unit_type} -> {self.target.unit_type} at ({self.target.x}, {self.target.y}))"
+
+
+class EndTurnAction:
+    """End the current side's turn."""
+    __slots__ = ()
+
+    def apply(self, game_state):
+        game_state._end_turn()
+        return True
+
+    def __repr__(self):
+        return "EndTurnAction()"
+
+
+def plan_move(grid, unit, x, y):
+    """Return a MoveAction taking unit to (x, y), or None if it can't get there this turn."""
+    if not unit.can_move():
+        return None
+    reachability = unit.get_reachability(grid)
+    if (x, y) not in reachability:
+        return None
+    return MoveAction(unit, x, y, reachability.cost_to(x, y), reachability)
+
+
+def plan_attack(unit, target):
+    """Return an AttackAction of unit on target, or None if the attack isn't allowed."""
+    if target is None or not target.is_alive() or target.is_player == unit.is_player:
+        return None
+    if not unit.can_attack() or not unit.is_in_range(target):
+        return None
+    return AttackAction(unit, target)
+
+
+def legal_actions(game_state, unit=None):
+    """Return every move and attack unit can make right now.
+
+    Without a unit, lists the actions of every unit on the side to move,
+    followed by an EndTurnAction.
+    """
+    if unit is None:
+        side = game_state.player_units if game_state.current_turn == "player" else game_state.enemy_units
+        actions = [action for member in list(side) for action in legal_actions(game_state, member)]
+        actions.append(EndTurnAction())
+        return actions
+
+    grid = game_state.grid
+    actions = []
+    if unit.can_move():
+        reachability = unit.get_reachability(grid)
+        actions.extend(MoveAction(unit, x, y, reachability.cost_to(x, y), reachability)
+                       for x, y in reachability.cells())
+    if unit.can_attack():
+        opponents = game_state.enemy_units if unit.is_player else game_state.player_units
+        actions.extend(AttackAction(unit, target) for target in unit.get_valid_attack_targets(grid, opponents))
+    return actions
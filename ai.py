@@ -0,0 +1,270 @@
+# ai.py
+from collections import deque
+
+from actions import AttackAction, MoveAction, plan_move
+from flow_field import FlowField
+from mcts import MCTSAI
+from pathfinding import DIRECTIONS, compute_reachability, multi_source_distances
+
+
+class RandomAI:
+    """Moves each unit to random reachable cells, then attacks a random target in range."""
+
+    def __init__(self, rng=None):
+        # Without an explicit RNG the game state's seeded RNG is used
+        self.rng = rng
+
+    def take_turn(self, game_state, units, opponents):
+        grid = game_state.grid
+        rng = self.rng if self.rng is not None else game_state.rng
+
+        for unit in list(units):
+            if not unit.is_alive():
+                continue
+
+            # As long as the unit has movement points and hasn't attacked
+            while unit.can_move() and unit.current_move_points > 0:
+                # Find possible move targets within movement range based on current move points
+                reachability = unit.get_reachability(grid)
+                move_cells = reachability.cells()
+
+                if move_cells:
+                    # Choose a random move; the cached search already priced it
+                    new_x, new_y = rng.choice(move_cells)
+                    game_state.apply(plan_move(grid, unit, new_x, new_y))
+                else:
+                    # No valid moves left
+                    break
+
+            # Try to attack if possible
+            if unit.can_attack():
+                # Find targets in range
+                targets = unit.get_valid_attack_targets(grid, opponents)
+
+                if targets:
+                    # Attack a random target
+                    target = rng.choice(targets)
+                    game_state.apply(AttackAction(unit, target))
+
+
+def build_threat_map(grid, opponents):
+    """Return {flat cell index: summed strength of every opponent that can hit it next turn}.
+
+    A cell is threatened by an opponent if it lies within the opponent's
+    attack range of any cell the opponent can move to with a full turn of
+    move points (including where it stands). Each opponent costs one
+    bounded reachability search plus a breadth-first dilation of its reach
+    by its range. Cells no opponent can reach are left out, so the map only
+    covers the area around the opponents even on very large maps.
+    """
+    width, height = grid.width, grid.height
+    threat = {}
+
+    for opponent in opponents:
+        if not opponent.is_alive():
+            continue
+
+        # Seed the dilation with every cell the opponent could attack from
+        depth = {opponent.y * width + opponent.x: 0}
+        reachability = compute_reachability(grid, opponent.x, opponent.y, opponent.max_move_points)
+        for x, y in reachability.cells():
+            depth[y * width + x] = 0
+        queue = deque(depth)
+
+        # Attack range is Manhattan distance, so expand one ring per step
+        while queue:
+            i = queue.popleft()
+            d = depth[i]
+            if d == opponent.range:
+                continue
+            x, y = i % width, i // width
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height:
+                    ni = ny * width + nx
+                    if ni not in depth:
+                        depth[ni] = d + 1
+                        queue.append(ni)
+
+        for i in depth:
+            threat[i] = threat.get(i, 0) + opponent.strength
+
+    return threat
+
+
+class TacticalAI:
+    """Scores every reachable cell from precomputed influence maps and picks the best move+attack.
+
+    Once per turn it builds a distance-to-nearest-opponent map (a single
+    multi-source Dijkstra, searched out to DISTANCE_HORIZON and estimated
+    beyond it) and an aggregated threat map of opponent attack coverage.
+    Both are sparse and only cover the area around the opponents, so the
+    AI also plays chunked maps without loading the whole terrain. Each unit then does one reachability search and a single
+    lookup pass over the cells it can reach. The maps are only rebuilt when
+    an opponent is killed.
+    """
+
+    # Scoring weights; threat is weighed heavily only where it could kill the unit
+    ATTACK_BONUS = 5
+    DAMAGE_WEIGHT = 3
+    KILL_BONUS = 10
+    THREAT_WEIGHT = 0.3
+    LETHAL_THREAT_WEIGHT = 2
+    DISTANCE_WEIGHT = 1
+    # Movement cost out to which distances to the opponents are searched exactly
+    DISTANCE_HORIZON = 100
+
+    def __init__(self, rng=None):
+        # Decisions are deterministic; rng is accepted for a uniform controller interface
+        self.rng = rng
+
+    def take_turn(self, game_state, units, opponents):
+        grid = game_state.grid
+        distance_map, threat_map = self._build_maps(grid, opponents)
+
+        for unit in list(units):
+            if not unit.is_alive():
+                continue
+
+            x, y, target = self._choose_action(grid, unit, opponents, distance_map, threat_map)
+
+            if (x, y) != (unit.x, unit.y):
+                game_state.apply(plan_move(grid, unit, x, y))
+
+            if target is not None:
+                game_state.apply(AttackAction(unit, target))
+                if not target.is_alive():
+                    distance_map, threat_map = self._build_maps(grid, opponents)
+
+    def _build_maps(self, grid, opponents):
+        alive = [o for o in opponents if o.is_alive()]
+        distance_map = multi_source_distances(grid, [(o.x, o.y) for o in alive], self.DISTANCE_HORIZON)
+        threat_map = build_threat_map(grid, alive)
+        return distance_map, threat_map
+
+    def _choose_action(self, grid, unit, opponents, distance_map, threat_map):
+        """Return (x, y, target) for the best-scoring reachable cell."""
+        width = grid.width
+        can_attack = unit.can_attack()
+
+        candidates = [(unit.x, unit.y)]
+        if unit.can_move():
+            candidates.extend(unit.get_reachability(grid).cells())
+
+        best = None
+        best_score = float('-inf')
+        for x, y in candidates:
+            i = y * width + x
+            threat = threat_map.get(i, 0)
+            threat_weight = self.LETHAL_THREAT_WEIGHT if threat >= unit.current_hp else self.THREAT_WEIGHT
+            score = -threat * threat_weight - distance_map[i] * self.DISTANCE_WEIGHT
+
+            target = None
+            if can_attack:
+                target, attack_score = self._best_target(grid, unit, x, y, opponents)
+                score += attack_score
+
+            if best is None or score > best_score:
+                best_score = score
+                best = (x, y, target)
+
+        return best
+
+    def _best_target(self, grid, unit, x, y, opponents):
+        """Return (target, score) for the best opponent in range of (x, y), or (None, 0)."""
+        best_target = None
+        best_score = 0
+        for target in grid.get_units_within(x, y, unit.range, not unit.is_player):
+            if not target.is_alive() or target not in opponents:
+                continue
+
+            damage = min(unit.strength, target.current_hp)
+            score = self.ATTACK_BONUS + damage * self.DAMAGE_WEIGHT
+            if damage >= target.current_hp:
+                score += self.KILL_BONUS
+
+            if score > best_score:
+                best_score = score
+                best_target = target
+
+        return best_target, best_score
+
+
+class FlowFieldAI:
+    """Horde controller: every unit walks one shared flow field toward the nearest opponent.
+
+    The field is built once per turn and follows occupancy changes and
+    deaths while the turn runs, so each unit only reads
+    its next steps instead of running its own search. Units stop as soon as
+    an opponent is in range and attack the weakest one they can hit.
+    """
+
+    def __init__(self, rng=None):
+        # Decisions are deterministic; rng is accepted for a uniform controller interface
+        self.rng = rng
+
+    def take_turn(self, game_state, units, opponents):
+        grid = game_state.grid
+        field = FlowField(grid, [(o.x, o.y) for o in opponents if o.is_alive()])
+        field.attach()
+        try:
+            for unit in list(units):
+                if not unit.is_alive():
+                    continue
+
+                target = self._weakest_target(grid, unit, opponents)
+                if target is None and unit.can_move():
+                    move = self._advance(grid, field, unit)
+                    if move is not None:
+                        game_state.apply(move)
+                        target = self._weakest_target(grid, unit, opponents)
+
+                if target is not None:
+                    x, y = target.x, target.y
+                    game_state.apply(AttackAction(unit, target))
+                    if not target.is_alive():
+                        field.remove_goal(x, y)
+        finally:
+            field.detach()
+
+    def _weakest_target(self, grid, unit, opponents):
+        if not unit.can_attack():
+            return None
+        targets = unit.get_valid_attack_targets(grid, opponents)
+        return min(targets, key=lambda t: t.current_hp) if targets else None
+
+    def _advance(self, grid, field, unit):
+        """Follow the field as far as move points allow; returns a MoveAction or None."""
+        width = grid.width
+        enemy_side = not unit.is_player
+        x, y = unit.x, unit.y
+        points = unit.current_move_points
+        cost = 0
+        path = []
+
+        while True:
+            n = field.next[y * width + x]
+            # Stop at goals, dead ends and cells another unit is standing on
+            if n < 0 or grid.occupants[n] is not None:
+                break
+            step_cost = grid.cell_costs[n]
+            if cost + step_cost > points:
+                break
+            cost += step_cost
+            x, y = n % width, n // width
+            path.append((x, y))
+            if grid.get_units_within(x, y, unit.range, enemy_side):
+                break
+
+        if not path:
+            return None
+        return MoveAction(unit, x, y, cost, path=path)
+
+
+# AI controllers selectable by name (simulation runner, config)
+AI_TYPES = {
+    'random': RandomAI,
+    'tactical': TacticalAI,
+    'flow': FlowFieldAI,
+    'mcts': MCTSAI,
+}
@@ -0,0 +1,219 @@
+# ai_worker.py
+"""Enemy turns computed on a background thread.
+
+Without a worker GameState.update() runs the whole enemy turn inside one
+frame, so a slow controller freezes the window. An AIWorker instead hands
+the turn to a thread that plays it on a private copy of the game, restored
+from a snapshot of the real one. Every move and attack the controller makes
+on the copy is streamed back through a queue, and update() (called once a
+frame from GameState.update) applies whatever has arrived to the real game,
+so the main loop keeps rendering and handling input while the AI thinks.
+
+cancel() stops the turn: the real game keeps the actions applied so far
+and play passes to the player straight away, while the thread gives up at
+the controller's next action. Each turn gets its own queue and cancel flag,
+so anything a cancelled thread still sends is never applied, and the next
+turn waits for that thread to exit before starting. The copy is only touched by the worker thread and the
+real game only by the main thread, so no locking is needed beyond the
+queue. The seeded RNG is handed across as well, so a match plays out
+exactly as it would without the worker.
+"""
+import queue
+import threading
+
+from actions import AttackAction, MoveAction
+from chunked_terrain import ChunkedTerrain
+from game_state import GameState
+from grid import Grid
+from profiler import profiler
+from unit_table import UnitTable
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class _ActionStream:
+    """Recorder for the private copy that forwards its actions to the worker."""
+
+    def __init__(self, worker, messages, cancel):
+        self.worker = worker
+        self.messages = messages
+        self.cancel = cancel
+
+    def _check(self):
+        if self.cancel.is_set():
+            raise _Cancelled()
+
+    def record_move(self, unit_id, x, y, movement_cost):
+        self._check()
+        self.worker._acted(unit_id)
+        self.messages.put(('move', unit_id, x, y, movement_cost))
+
+    def record_attack(self, attacker_id, target_id):
+        self._check()
+        self.worker._acted(attacker_id)
+        self.messages.put(('attack', attacker_id, target_id))
+
+    # Controllers only move and attack; the rest of the recorder interface is unused
+    def record_select(self, unit_id):
+        pass
+
+    def record_deselect(self):
+        pass
+
+    def record_end_turn(self):
+        pass
+
+    def record_undo(self):
+        pass
+
+    def record_redo(self):
+        pass
+
+
+class AIWorker:
+    def __init__(self, game_state):
+        self.game_state = game_state
+        self._shadow = None  # Private GameState the worker thread plays on
+        self._messages = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = None
+        self._retiring = None  # Cancelled thread that hasn't reached its next action yet
+        self._acting = set()  # Unit IDs that have moved or attacked this turn
+        self._unit_count = 0
+        self.error = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    @property
+    def progress(self):
+        """Fraction of the side's units that have acted so far this turn."""
+        if not self._unit_count:
+            return 0.0
+        return min(1.0, len(self._acting) / self._unit_count)
+
+    def start(self):
+        """Start computing the enemy turn from the current state of the game.
+
+        Does nothing while a cancelled thread is still winding down; it shares
+        the controller and the private copy, so update() retries next frame.
+        """
+        if self.running:
+            return
+        if self._retiring is not None:
+            if self._retiring.is_alive():
+                return
+            self._retiring = None
+        game_state = self.game_state
+        snapshot = game_state.snapshot()
+        rng_state = game_state.rng.getstate()
+        ordering = game_state.grid.unit_index.ordering(game_state.unit_ids)
+
+        self._messages = queue.Queue()
+        self._cancel = threading.Event()
+        self._acting = set()
+        self._unit_count = len(game_state.enemy_units)
+        self.error = None
+        self._thread = threading.Thread(target=self._run,
+                                        args=(snapshot, rng_state, ordering, self._messages, self._cancel),
+                                        name="ai-worker", daemon=True)
+        self._thread.start()
+
+    def _run(self, snapshot, rng_state, ordering, messages, cancel):
+        try:
+            shadow = self._shadow_state()
+            shadow.restore(snapshot)
+            # Restoring re-adds units in a different order; iterate them like the real game does
+            shadow.grid.unit_index.reorder(ordering, shadow.units)
+            shadow.rng.setstate(rng_state)
+            shadow.combat_notifications.clear()
+
+            shadow.recorder = _ActionStream(self, messages, cancel)
+            try:
+                with profiler.span('enemy_turn'):
+                    self.game_state.enemy_ai.take_turn(shadow, shadow.enemy_units, shadow.player_units)
+            finally:
+                shadow.recorder = None
+            messages.put(('done', shadow.rng.getstate()))
+        except _Cancelled:
+            messages.put(('cancelled',))
+        except Exception as error:
+            # Handed to the main thread, which ends the turn instead of hanging on it
+            messages.put(('error', error))
+
+    def _shadow_state(self):
+        if self._shadow is None:
+            game_state = self.game_state
+            # Plan on the same terrain as the real grid, even one passed to Grid explicitly
+            terrain = game_state.grid.terrain
+            if isinstance(terrain, ChunkedTerrain):
+                # A handle of its own on the file, so the chunk LRU isn't shared between threads
+                terrain = ChunkedTerrain(terrain.path, terrain.max_chunks)
+            else:
+                terrain = None
+            grid = Grid(game_state.config, game_state.level_index, terrain=terrain)
+            unit_table = UnitTable() if game_state.unit_table is not None else None
+            self._shadow = GameState(grid, game_state.config, game_state.level_index, verbose=False,
+                                     unit_table=unit_table, seed=0)
+        return self._shadow
+
+    def _acted(self, unit_id):
+        self._acting.add(unit_id)
+
+    def _stop(self):
+        """Tell the thread to give up and stop listening to it; returns False if none was running."""
+        if not self.running:
+            return False
+        self._cancel.set()
+        self._retiring = self._thread
+        self._thread = None
+        return True
+
+    def cancel(self):
+        """End the enemy turn now, keeping the actions applied so far (non-blocking)."""
+        if self._stop():
+            self.game_state._end_turn()
+
+    def close(self, timeout=0.5):
+        """Stop the thread and wait briefly for it; it's a daemon, so exiting doesn't wait on it."""
+        if self._stop():
+            self._retiring.join(timeout)
+
+    def update(self):
+        """Apply the actions that have arrived; ends the turn once the worker is done.
+
+        Starts the worker if it isn't running. Returns True while the turn is
+        still being computed.
+        """
+        if not self.running:
+            self.start()
+            if not self.running:
+                return True
+
+        game_state = self.game_state
+        units = game_state.units
+        while True:
+            try:
+                message = self._messages.get_nowait()
+            except queue.Empty:
+                return True
+
+            kind = message[0]
+            if kind == 'move':
+                _kind, unit_id, x, y, cost = message
+                game_state.apply(MoveAction(units[unit_id], x, y, cost))
+            elif kind == 'attack':
+                _kind, attacker_id, target_id = message
+                game_state.apply(AttackAction(units[attacker_id], units[target_id]))
+            else:
+                self._thread = None
+                if kind == 'done':
+                    game_state.rng.setstate(message[1])
+                else:
+                    self.error = message[1]
+                    game_state._log(f"Enemy AI failed: {self.error!r}")
+                game_state._end_turn()
+                return False
@@ -0,0 +1,259 @@
+# benchmark.py
+"""Micro-benchmarks for the hot paths on generated maps of increasing size.
+
+Maps are built from the terrain_mapping characters in config.yaml (cheaper
+terrain is more common so the map stays traversable) with two armies facing
+each other in the middle. Every benchmark times one call of:
+
+    move_range    Unit.get_move_range_cells (reachability cache cleared first)
+    move_cost     Unit.get_movement_cost_to a cell in the far corner (caches cleared first)
+    hpa_path      HierarchicalPathfinder.find_path to the far corner (sectors already built)
+    attack_range  Unit.get_attack_range_cells (range cache cleared first)
+    enemy_turn    GameState._enemy_turn with the tactical AI (or --enemy-ai)
+    render        Renderer.render() with a unit selected (SDL dummy driver)
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --compare baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+# Rendering benchmarks never open a real window
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from ai import AI_TYPES
+from config_loader import load_config
+from game_state import GameState
+from grid import Grid
+from hpa import HierarchicalPathfinder
+from pathfinding import cells_in_range
+
+DEFAULT_SIZES = [10, 50, 200, 1000]
+BENCHMARKS = ['move_range', 'move_cost', 'hpa_path', 'attack_range', 'enemy_turn', 'render']
+
+
+def generate_level(config, width, height, seed=0, units_per_side=None):
+    """Return a level dict with a random layout and two armies facing each other mid-map."""
+    rng = random.Random(seed)
+    terrain_types = config['terrain_types']
+    chars = list(config['terrain_mapping'])
+    weights = [1.0 / terrain_types[config['terrain_mapping'][c]]['movement_cost'] for c in chars]
+    layout = [''.join(rng.choices(chars, weights, k=width)) for _ in range(height)]
+
+    if units_per_side is None:
+        units_per_side = min(50, max(2, min(width, height) // 10))
+    unit_types = list(config['unit_types'])
+    span = min(height, units_per_side)  # Units per column
+    cx, cy = width // 2, height // 2
+
+    player_units, enemy_units = [], []
+    for i in range(units_per_side):
+        column, row = divmod(i, span)
+        y = cy - span // 2 + row
+        unit_type = unit_types[i % len(unit_types)]
+        player_units.append([max(0, cx - 2 - column), y, unit_type])
+        enemy_units.append([min(width - 1, cx + 2 + column), y, unit_type])
+
+    return {
+        'name': f"Benchmark {width}x{height}",
+        'description': "Generated benchmark map",
+        'layout': layout,
+        'player_units': player_units,
+        'enemy_units': enemy_units
+    }
+
+
+def make_config(config, level):
+    """Copy of config whose only level is level."""
+    config = dict(config)
+    config['levels'] = [level]
+    return config
+
+
+def time_call(func, setup=None, min_time=0.5, max_repeats=100):
+    """Time func() (after an untimed setup()) until min_time has been spent; returns stats in seconds."""
+    samples = []
+    total = 0.0
+    while total < min_time and len(samples) < max_repeats:
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        total += elapsed
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'repeats': len(samples)
+    }
+
+
+def _new_game(config):
+    grid = Grid(config, 0)
+    return grid, GameState(grid, config, 0, verbose=False, seed=0)
+
+
+def bench_move_range(config, args):
+    grid, game_state = _new_game(config)
+    unit = next(iter(game_state.player_units))
+    unit.current_move_points = args.move_points
+
+    def setup():
+        unit._reachability_key = None
+
+    return time_call(lambda: unit.get_move_range_cells(grid), setup, args.min_time)
+
+
+def bench_move_cost(config, args):
+    grid, game_state = _new_game(config)
+    unit = next(iter(game_state.player_units))
+    unit.current_move_points = args.move_points
+    target = (grid.width - 1, grid.height - 1)
+
+    def setup():
+        unit._reachability_key = None
+        grid.path_cache.clear()
+
+    return time_call(lambda: unit.get_movement_cost_to(grid, *target), setup, args.min_time)
+
+
+def bench_hpa_path(config, args):
+    grid, game_state = _new_game(config)
+    unit = next(iter(game_state.player_units))
+    pathfinder = HierarchicalPathfinder(grid)
+    query = lambda: pathfinder.find_path(unit.x, unit.y, grid.width - 1, grid.height - 1)
+    query()  # Build the sectors the route touches
+    return time_call(query, min_time=args.min_time)
+
+
+def bench_attack_range(config, args):
+    grid, game_state = _new_game(config)
+    unit = max(game_state.player_units, key=lambda u: u.range)
+    return time_call(lambda: unit.get_attack_range_cells(grid), cells_in_range.cache_clear, args.min_time)
+
+
+def bench_enemy_turn(config, args):
+    grid, game_state = _new_game(config)
+    game_state.enemy_ai = AI_TYPES[args.enemy_ai]()
+    game_state.current_turn = "enemy"
+    start = game_state.snapshot()
+
+    def setup():
+        game_state.restore(start)
+        game_state.combat_notifications.clear()
+
+    return time_call(game_state._enemy_turn, setup, args.min_time)
+
+
+def bench_render(config, args):
+    import pygame
+    from input_handler import InputHandler
+    from renderer import Renderer
+
+    pygame.init()
+    window = config['game']['window']
+    screen = pygame.display.set_mode((window['width'], window['height']))
+    grid, game_state = _new_game(config)
+    game_state.input_handler = InputHandler(game_state, config)
+    renderer = Renderer(screen, game_state, config)
+
+    # Select a unit and put the cursor on it so highlights and panels are drawn
+    unit = next(iter(game_state.player_units))
+    game_state.cursor_x, game_state.cursor_y = unit.x, unit.y
+    game_state.select_unit_at_cursor()
+    renderer.render()
+
+    result = time_call(renderer.render, min_time=args.min_time)
+    pygame.quit()
+    return result
+
+
+BENCHMARK_FUNCTIONS = {
+    'move_range': bench_move_range,
+    'move_cost': bench_move_cost,
+    'hpa_path': bench_hpa_path,
+    'attack_range': bench_attack_range,
+    'enemy_turn': bench_enemy_turn,
+    'render': bench_render
+}
+
+
+def run(config, sizes, names, args):
+    """Run every benchmark in names on every map size; returns {"name/WxH": stats}."""
+    results = {}
+    for size in sizes:
+        level_config = make_config(config, generate_level(config, size, size, args.seed))
+        for name in names:
+            key = f"{name}/{size}x{size}"
+            results[key] = BENCHMARK_FUNCTIONS[name](level_config, args)
+            print(f"{key:<28} median {results[key]['median'] * 1000:10.3f} ms  "
+                  f"min {results[key]['min'] * 1000:10.3f} ms  ({results[key]['repeats']} runs)")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print each benchmark against the baseline; returns the keys that got slower than threshold."""
+    regressions = []
+    print(f"\n{'benchmark':<28} {'baseline':>12} {'current':>12} {'change':>8}")
+    for key, stats in results.items():
+        if key not in baseline:
+            print(f"{key:<28} {'-':>12} {stats['median'] * 1000:10.3f}ms {'new':>8}")
+            continue
+        before = baseline[key]['median']
+        change = stats['median'] / before - 1 if before > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<28} {before * 1000:10.3f}ms {stats['median'] * 1000:10.3f}ms {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pathfinding, AI turns and rendering.")
+    parser.add_argument('--config', default="config.yaml")
+    parser.add_argument('--size', type=int, action='append', help="square map size (repeatable)")
+    parser.add_argument('--bench', action='append', choices=BENCHMARKS, help="benchmark to run (repeatable)")
+    parser.add_argument('--seed', type=int, default=0, help="map generation seed")
+    parser.add_argument('--move-points', type=int, default=12, help="move points for the pathfinding benchmarks")
+    parser.add_argument('--enemy-ai', default='tactical', choices=sorted(AI_TYPES),
+                        help="controller timed by the enemy_turn benchmark")
+    parser.add_argument('--min-time', type=float, default=0.5, help="seconds to spend per benchmark")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', help="baseline JSON file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="allowed slowdown of the median before a comparison fails")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    results = run(config, args.size or DEFAULT_SIZES, args.bench or BENCHMARKS, args)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': results
+            }, file, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
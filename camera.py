@@ -0,0 +1,61 @@
+# camera.py
+class Camera:
+    """Viewport onto the grid for maps larger than the window.
+
+    The camera scrolls in whole cells: (x, y) is the grid cell drawn at the
+    window's top-left corner. follow() keeps a cell (the cursor) at least
+    margin cells away from the edges when the map is big enough to scroll,
+    and version changes whenever the view moves so cached layers know to
+    redraw.
+    """
+
+    def __init__(self, view_width, view_height, grid_width, grid_height, cell_size, margin=2):
+        self.cell_size = cell_size
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        # Cells that fit entirely, and cells touched at all (the last one may be cut off)
+        self.full_columns = max(1, view_width // cell_size)
+        self.full_rows = max(1, view_height // cell_size)
+        self.columns = -(-view_width // cell_size)
+        self.rows = -(-view_height // cell_size)
+        self.margin = margin
+        self.x = 0
+        self.y = 0
+        self.version = 0
+
+    def _scroll_axis(self, position, cell, full, size):
+        margin = min(self.margin, (full - 1) // 2)
+        if cell < position + margin:
+            position = cell - margin
+        elif cell > position + full - 1 - margin:
+            position = cell - full + 1 + margin
+        return max(0, min(position, size - full))
+
+    def follow(self, cell_x, cell_y):
+        """Scroll so (cell_x, cell_y) is comfortably on screen; returns True if the view moved."""
+        x = self._scroll_axis(self.x, cell_x, self.full_columns, self.grid_width)
+        y = self._scroll_axis(self.y, cell_y, self.full_rows, self.grid_height)
+        if (x, y) == (self.x, self.y):
+            return False
+        self.x, self.y = x, y
+        self.version += 1
+        return True
+
+    def visible_bounds(self):
+        """Return (x0, y0, x1, y1), the visible cells clipped to the grid (x1/y1 exclusive)."""
+        return (self.x, self.y,
+                min(self.grid_width, self.x + self.columns),
+                min(self.grid_height, self.y + self.rows))
+
+    def is_visible(self, cell_x, cell_y):
+        return (self.x <= cell_x < self.x + self.columns and
+                self.y <= cell_y < self.y + self.rows)
+
+    def to_screen(self, cell_x, cell_y):
+        """Pixel position of the top-left corner of a cell on screen."""
+        return ((cell_x - self.x) * self.cell_size, (cell_y - self.y) * self.cell_size)
+
+    @property
+    def offset(self):
+        """Pixel offset to subtract from world pixel coordinates."""
+        return (self.x * self.cell_size, self.y * self.cell_size)
@@ -0,0 +1,234 @@
+# chunked_terrain.py
+"""Chunked, memory-mapped terrain storage for very large maps.
+
+A terrain file holds one terrain ID byte per cell, grouped into square
+chunks of chunk_size x chunk_size cells (edge chunks are padded) so each
+chunk is one contiguous slice of the file:
+
+    header   b'TBST', format u8, width u32, height u32, chunk_size u16,
+             terrain name count u8, then each name as u8 length + UTF-8
+    chunks   chunk-major, row-major inside a chunk
+
+ChunkedTerrain maps the file and only copies a chunk out (and derives its
+movement costs) the first time a cell in it is read, keeping at most
+max_chunks of them in an LRU. Opening a 10k x 10k map is instant and
+memory grows with the area actually touched. It is indexed by flat cell
+index exactly like Grid.terrain, and ChunkedTerrain.costs like
+Grid.cell_costs, so pathfinding and rendering use it unchanged.
+
+    python chunked_terrain.py world.tbst --level 0
+    python chunked_terrain.py world.tbst --random 10000x10000 --seed 1
+"""
+import argparse
+import mmap
+import random
+import struct
+from collections import OrderedDict
+
+MAGIC = b'TBST'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBIIHB')  # magic, format, width, height, chunk size, terrain name count
+
+
+def write_terrain_file(path, width, height, terrain_names, rows, chunk_size=64):
+    """Write a terrain file from rows, an iterable of height bytes-like rows of width terrain IDs.
+
+    Rows are consumed one strip of chunk_size at a time, so maps far larger
+    than memory can be generated.
+    """
+    if len(terrain_names) > 255:
+        raise ValueError("At most 255 terrain types can be stored")
+
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, width, height, chunk_size, len(terrain_names)))
+        for name in terrain_names:
+            encoded = name.encode('utf-8')
+            file.write(struct.pack('<B', len(encoded)) + encoded)
+
+        chunks_wide = -(-width // chunk_size)
+        padded_width = chunks_wide * chunk_size
+        strip = []
+        rows = iter(rows)
+        for y in range(0, height, chunk_size):
+            strip.clear()
+            for _ in range(min(chunk_size, height - y)):
+                row = bytes(next(rows))
+                if len(row) != width:
+                    raise ValueError(f"Row {y + len(strip)} has {len(row)} cells, expected {width}")
+                strip.append(row.ljust(padded_width, b'\0'))
+            # Pad the last strip so every chunk has chunk_size rows
+            while len(strip) < chunk_size:
+                strip.append(bytes(padded_width))
+
+            for cx in range(chunks_wide):
+                start = cx * chunk_size
+                file.write(b''.join(row[start:start + chunk_size] for row in strip))
+
+
+def layout_rows(layout, terrain_mapping, terrain_names):
+    """Yield terrain ID rows for a config level layout (unknown characters become ID 0)."""
+    ids = {name: i for i, name in enumerate(terrain_names)}
+    width = len(layout[0]) if layout else 0
+    for row in layout:
+        row = row[:width].ljust(width, ' ')
+        yield bytes(ids.get(terrain_mapping.get(char), 0) for char in row)
+
+
+class _CostView:
+    """Grid.cell_costs-compatible view over a ChunkedTerrain."""
+    __slots__ = ('_terrain',)
+
+    def __init__(self, terrain):
+        self._terrain = terrain
+
+    def __getitem__(self, i):
+        return self._terrain.cost(i)
+
+    def __len__(self):
+        return len(self._terrain)
+
+
+class ChunkedTerrain:
+    def __init__(self, path, max_chunks=256):
+        self.path = path
+        self.max_chunks = max_chunks
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.width, self.height, self.chunk_size, name_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a terrain file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported terrain format version {version}")
+
+        offset = HEADER.size
+        self.terrain_names = []
+        for _ in range(name_count):
+            length = self._mmap[offset]
+            self.terrain_names.append(self._mmap[offset + 1:offset + 1 + length].decode('utf-8'))
+            offset += 1 + length
+        self._data_offset = offset
+
+        self.chunks_wide = -(-self.width // self.chunk_size)
+        self._chunk_bytes = self.chunk_size * self.chunk_size
+
+        # File terrain IDs -> caller's IDs, and the caller's cost per ID (see bind)
+        self._remap = None
+        self._cost_table = None
+
+        # chunk number -> (terrain IDs, movement costs); most recently used last
+        self._chunks = OrderedDict()
+        self._last_key = None
+        self._last_chunk = None
+        self.loads = 0
+        self.evictions = 0
+
+        self.costs = _CostView(self)
+
+    def bind(self, terrain_names, terrain_costs):
+        """Translate stored terrain IDs to the ID order of terrain_names, with costs by that ID.
+
+        Terrain names the file uses but the config doesn't know become ID 0.
+        """
+        ids = {name: i for i, name in enumerate(terrain_names)}
+        remap = bytearray(range(256))
+        for file_id, name in enumerate(self.terrain_names):
+            remap[file_id] = ids.get(name, 0)
+        self._remap = bytes(remap)
+        self._cost_table = list(terrain_costs)
+        self.clear()
+
+    def clear(self):
+        """Drop every loaded chunk."""
+        self._chunks.clear()
+        self._last_key = None
+        self._last_chunk = None
+
+    def close(self):
+        self.clear()
+        self._mmap.close()
+        self._file.close()
+
+    def __len__(self):
+        return self.width * self.height
+
+    def _chunk(self, key):
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+            return chunk
+
+        start = self._data_offset + key * self._chunk_bytes
+        terrain = self._mmap[start:start + self._chunk_bytes]
+        if self._remap is not None:
+            terrain = terrain.translate(self._remap)
+        cost_table = self._cost_table
+        costs = [cost_table[t] for t in terrain] if cost_table is not None else None
+
+        chunk = self._chunks[key] = (terrain, costs)
+        self.loads += 1
+        if len(self._chunks) > self.max_chunks:
+            self._chunks.popitem(last=False)
+            self.evictions += 1
+        return chunk
+
+    def _locate(self, i):
+        """Return (chunk, offset inside the chunk) for flat cell index i."""
+        y, x = divmod(i, self.width)
+        size = self.chunk_size
+        cy, ry = divmod(y, size)
+        cx, rx = divmod(x, size)
+        key = cy * self.chunks_wide + cx
+        # Consecutive reads usually stay in one chunk, so skip the LRU for those
+        if key != self._last_key:
+            self._last_chunk = self._chunk(key)
+            self._last_key = key
+        return self._last_chunk, ry * size + rx
+
+    def __getitem__(self, i):
+        chunk, offset = self._locate(i)
+        return chunk[0][offset]
+
+    def cost(self, i):
+        """Movement cost of entering cell i (requires bind())."""
+        chunk, offset = self._locate(i)
+        return chunk[1][offset]
+
+    def get_stats(self):
+        return {'loaded_chunks': len(self._chunks), 'loads': self.loads, 'evictions': self.evictions}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a chunked terrain file.")
+    parser.add_argument('output')
+    parser.add_argument('--config', default="config.yaml")
+    parser.add_argument('--level', type=int, help="convert this level's layout")
+    parser.add_argument('--random', metavar='WxH', help="generate random terrain of this size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=64)
+    args = parser.parse_args()
+
+    from config_loader import load_config
+    config = load_config(args.config)
+    terrain_names = list(config['terrain_types'])
+
+    if args.random:
+        width, height = (int(n) for n in args.random.lower().split('x'))
+        rng = random.Random(args.seed)
+        # Cheaper terrain is more common so the map stays traversable
+        weights = [1.0 / config['terrain_types'][name]['movement_cost'] for name in terrain_names]
+        ids = range(len(terrain_names))
+        rows = (bytes(rng.choices(ids, weights, k=width)) for _ in range(height))
+    elif args.level is not None:
+        layout = config['levels'][args.level]['layout']
+        width, height = len(layout[0]), len(layout)
+        rows = layout_rows(layout, config['terrain_mapping'], terrain_names)
+    else:
+        parser.error("one of --level or --random is required")
+
+    write_terrain_file(args.output, width, height, terrain_names, rows, args.chunk_size)
+    print(f"Wrote {width}x{height} terrain to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ class CombatNotification:
         self.message = message
         self.x = x
         self.y = y
-        self.color = color
+        self.color = tuple(color)
         self.duration = duration
         self.frames_left = duration
         self.y_offset = 0
@@ -15,17 +15,16 @@ class CombatNotification:
         self.y_offset -= 0.5
         return self.frames_left > 0
     
-    def render(self, screen, font):
-        alpha = min(255, int(255 * (self.frames_left / self.duration)))
-        text_surface = font.render(self.message, True, self.color)
-        
-        # Create a surface with alpha for fading
-        temp_surface = pygame.Surface(text_surface.get_size(), pygame.SRCALPHA)
-        temp_surface.fill((0, 0, 0, 0))  # Transparent background
-        temp_surface.blit(text_surface, (0, 0))
-        
-        # Apply alpha
-        temp_surface.set_alpha(alpha)
-        
-        # Draw at position with current offset
-        screen.blit(temp_surface, (self.x, self.y + self.y_offset))
+    def get_alpha(self):
+        """Opacity from 255 (new) fading to 0 (expired)."""
+        return min(255, int(255 * (self.frames_left / self.duration)))
+
+
+def update_notifications(notifications):
+    """Advance every notification and drop the expired ones, in place."""
+    keep = 0
+    for notification in notifications:
+        if notification.update():
+            notifications[keep] = notification
+            keep += 1
+    del notifications[keep:]
@@ -0,0 +1,162 @@
+# config_loader.py
+"""Config loading with a compiled cache.
+
+The first load of a config.yaml parses it (with the C YAML loader when
+PyYAML was built with libyaml), validates it and writes the result to
+__pycache__/<name>.cache next to the source, much like a .pyc. Later loads
+unpickle that cache in a few milliseconds. The cache is reused while the
+source's mtime and size match, or when its SHA-256 still matches after a
+touch; anything else recompiles.
+
+Compiling also resolves each level's layout into a grid of terrain IDs
+(level['terrain_grid'], row-major bytes indexed like Grid.terrain) so Grid
+doesn't have to interpret the layout strings. Next to it goes the layout,
+mapping and terrain order it was built from (level['terrain_source'], see
+grid.layout_key); Grid only uses the compiled grid while those still match,
+so a config edited after loading never gets stale terrain.
+"""
+import hashlib
+import os
+import pickle
+
+import yaml
+
+from grid import layout_key
+
+try:
+    SafeLoader = yaml.CSafeLoader
+except AttributeError:
+    SafeLoader = yaml.SafeLoader
+
+# Bump whenever the compiled layout changes so old caches are ignored
+CACHE_FORMAT = 2
+
+
+def load_config(config_file="config.yaml", use_cache=True):
+    """Load the game configuration without touching pygame."""
+    if not use_cache:
+        with open(config_file, 'rb') as file:
+            return compile_config(file.read())
+
+    cache_file = _cache_path(config_file)
+    stat = os.stat(config_file)
+    cached = _read_cache(cache_file)
+    if cached is not None and (cached['mtime_ns'], cached['size']) == (stat.st_mtime_ns, stat.st_size):
+        return cached['config']
+
+    with open(config_file, 'rb') as file:
+        source = file.read()
+    digest = hashlib.sha256(source).hexdigest()
+    if cached is not None and cached['sha256'] == digest:
+        config = cached['config']
+    else:
+        config = compile_config(source)
+    # Rewrite the cache so the next load can skip hashing
+    _write_cache(cache_file, {
+        'format': CACHE_FORMAT,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': digest,
+        'config': config
+    })
+    return config
+
+
+def compile_config(source):
+    """Parse and validate YAML source, returning the config with compiled level data."""
+    config = yaml.load(source, Loader=SafeLoader)
+    validate_config(config)
+
+    terrain_ids = {name: i for i, name in enumerate(config['terrain_types'])}
+    mapping = {char: terrain_ids.get(name, 0) for char, name in config['terrain_mapping'].items()}
+    for level in config['levels']:
+        layout = level.get('layout')
+        if not layout:
+            continue  # Terrain comes from a chunked terrain_file
+        width = len(layout[0]) if layout else 0
+        terrain_grid = bytearray()
+        for row in layout:
+            # Rows are clipped/padded to the first row's width, like Grid does
+            row = row[:width].ljust(width, ' ')
+            terrain_grid.extend(mapping.get(char, 0) for char in row)
+        level['terrain_grid'] = bytes(terrain_grid)
+        level['terrain_source'] = layout_key(layout, config['terrain_mapping'], config['terrain_types'])
+    return config
+
+
+def validate_config(config):
+    """Raise ValueError for configs the game can't run; print warnings for recoverable issues."""
+    if not isinstance(config, dict):
+        raise ValueError("Config must be a mapping")
+    missing = [key for key in ('game', 'controls', 'terrain_mapping', 'terrain_types', 'unit_types', 'levels')
+               if key not in config]
+    if missing:
+        raise ValueError(f"Config is missing sections: {', '.join(missing)}")
+
+    terrain_types = config['terrain_types']
+    if len(terrain_types) > 256:
+        raise ValueError("At most 256 terrain types are supported")
+    for name, terrain in terrain_types.items():
+        for key in ('color', 'movement_cost', 'description'):
+            if key not in terrain:
+                raise ValueError(f"Terrain type '{name}' has no '{key}'")
+    for char, name in config['terrain_mapping'].items():
+        if name not in terrain_types:
+            raise ValueError(f"Terrain mapping '{char}' refers to unknown terrain type '{name}'")
+
+    for name, unit_type in config['unit_types'].items():
+        for key in ('strength', 'range', 'hp', 'move', 'color', 'description'):
+            if key not in unit_type:
+                raise ValueError(f"Unit type '{name}' has no '{key}'")
+
+    for index, level in enumerate(config['levels']):
+        name = level.get('name', f"level {index}")
+        layout = level.get('layout')
+        if not layout and not level.get('terrain_file'):
+            raise ValueError(f"Level '{name}' has no layout or terrain_file")
+        # Chunked terrain files are checked when Grid opens them
+        layout = layout or []
+        width = len(layout[0]) if layout else None
+        for y, row in enumerate(layout):
+            if len(row) != width:
+                print(f"Warning: {name} row {y} is {len(row)} cells wide, expected {width}")
+            unknown = set(row) - set(config['terrain_mapping'])
+            if unknown:
+                print(f"Warning: {name} row {y} uses unmapped terrain {''.join(sorted(unknown))}")
+        for side in ('player_units', 'enemy_units'):
+            for unit_data in level.get(side, []):
+                if len(unit_data) < 3:
+                    continue  # GameState reports malformed entries
+                x, y, unit_type = unit_data[:3]
+                if unit_type not in config['unit_types']:
+                    raise ValueError(f"{name}: unknown unit type '{unit_type}' in {side}")
+                if width is not None and not (0 <= x < width and 0 <= y < len(layout)):
+                    print(f"Warning: {name}: {side} position ({x}, {y}) is outside the map")
+
+
+def _cache_path(config_file):
+    directory, name = os.path.split(os.path.abspath(config_file))
+    return os.path.join(directory, '__pycache__', name + '.cache')
+
+
+def _read_cache(cache_file):
+    try:
+        with open(cache_file, 'rb') as file:
+            cached = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get('format') != CACHE_FORMAT:
+        return None
+    return cached
+
+
+def _write_cache(cache_file, cached):
+    # The cache is only an optimisation, so a read-only install just skips it
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(temp_file, 'wb') as file:
+            pickle.dump(cached, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+    except OSError:
+        pass
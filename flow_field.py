@@ -0,0 +1,208 @@
+# flow_field.py
+"""Shared flow fields for many units heading to the same goals.
+
+A FlowField is an integration field (the cost of walking from every cell
+to the nearest goal cell) plus a direction field (the neighbour to step
+to next), built with one multi-source Dijkstra over the grid's terrain
+costs. Any number of units can then read their next step in O(1) instead
+of each running its own search.
+
+Cells with a unit on them (other than goal cells) can't be walked through,
+but still get a value so the unit standing there can read its way out.
+While attached, the field listens to the grid's occupancy changes and
+repairs itself incrementally: a cell that empties only lowers costs and is
+propagated outward from, and a cell that fills only invalidates the cells
+whose route ran through it. Goals can be dropped the same way when the
+unit on them dies.
+"""
+import heapq
+
+from pathfinding import DIRECTIONS
+
+INFINITY = float('inf')
+
+
+class FlowField:
+    def __init__(self, grid, goals):
+        """Build the field toward goals, an iterable of (x, y) cells."""
+        if grid.is_chunked:
+            # The field covers every cell, which would load the whole terrain file
+            raise ValueError("FlowField doesn't support chunked terrain; use TacticalAI on terrain_file levels")
+        self.grid = grid
+        self.width = grid.width
+        self.height = grid.height
+        self.distances = []
+        self.next = []  # Flat index of the neighbour to step to, -1 at goals and dead ends
+        self.goals = set()
+        self._attached = False
+        self.rebuild(goals)
+
+    def rebuild(self, goals):
+        """Recompute the whole field for a new goal set."""
+        width = self.width
+        size = width * self.height
+        self.goals = {y * width + x for x, y in goals}
+        self.distances = [INFINITY] * size
+        self.next = [-1] * size
+
+        queue = []
+        for i in self.goals:
+            self.distances[i] = 0
+            queue.append((0, i))
+        heapq.heapify(queue)
+        self._propagate(queue)
+
+    def attach(self):
+        """Start following occupancy changes on the grid."""
+        if not self._attached:
+            self.grid.add_listener(self.on_cell_changed)
+            self._attached = True
+
+    def detach(self):
+        if self._attached:
+            self.grid.remove_listener(self.on_cell_changed)
+            self._attached = False
+
+    def _blocked(self, i):
+        return self.grid.occupants[i] is not None and i not in self.goals
+
+    def _neighbours(self, i):
+        width = self.width
+        x, y = i % width, i // width
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < self.height:
+                yield ny * width + nx
+
+    def _propagate(self, queue):
+        """Dijkstra outward from the queued (distance, cell) entries."""
+        distances, next_step = self.distances, self.next
+        cell_costs = self.grid.cell_costs
+        occupants = self.grid.occupants
+        goals = self.goals
+        width, height = self.width, self.height
+
+        while queue:
+            distance, i = heapq.heappop(queue)
+            if distance > distances[i]:
+                continue
+            # Occupied cells keep their value but nothing can route through them
+            if occupants[i] is not None and i not in goals:
+                continue
+
+            # Stepping from a neighbour into this cell costs this cell's terrain
+            step = distance + cell_costs[i]
+            x, y = i % width, i // width
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                ni = ny * width + nx
+                if step < distances[ni]:
+                    distances[ni] = step
+                    next_step[ni] = i
+                    heapq.heappush(queue, (step, ni))
+
+    def _best_neighbour(self, i, excluded=()):
+        """Return (distance, neighbour) for the cheapest passable way out of i."""
+        best = (INFINITY, -1)
+        cell_costs = self.grid.cell_costs
+        for n in self._neighbours(i):
+            if n in excluded or self._blocked(n):
+                continue
+            distance = self.distances[n] + cell_costs[n]
+            if distance < best[0]:
+                best = (distance, n)
+        return best
+
+    def on_cell_changed(self, x, y):
+        """Grid listener: repair the field after (x, y) gained or lost a unit."""
+        i = y * self.width + x
+        if i in self.goals:
+            return  # Goals are always enterable
+
+        if self._blocked(i):
+            self._cell_filled(i)
+        else:
+            self._cell_emptied(i)
+
+    def _cell_emptied(self, i):
+        # The cell's own value is still right (it was a dead end before); routes
+        # through it can only get cheaper, so propagate outward from it
+        if self.distances[i] == INFINITY:
+            self.distances[i], self.next[i] = self._best_neighbour(i)
+        if self.distances[i] < INFINITY:
+            self._propagate([(self.distances[i], i)])
+
+    def _cell_filled(self, i):
+        # Every cell whose route ran through i has to be recomputed
+        self._reroute(self._upstream(i))
+
+    def remove_goal(self, x, y):
+        """Drop (x, y) from the goals (e.g. its unit died) and repair the field."""
+        i = y * self.width + x
+        if i not in self.goals:
+            return
+        self.goals.discard(i)
+        affected = self._upstream(i)
+        affected.add(i)
+        self._reroute(affected)
+
+    def _upstream(self, i):
+        """Return the cells whose route to a goal passed through i and has to change.
+
+        Cells are visited in order of distance, so by the time a cell is
+        looked at every invalidated cell closer to the goals is known. A cell
+        with another neighbour giving the same distance is just re-pointed
+        there, and the cells behind it keep their routes.
+        """
+        distances, next_step = self.distances, self.next
+        cell_costs = self.grid.cell_costs
+        affected = set()
+        queue = [(distances[i], i)]
+        while queue:
+            distance, cell = heapq.heappop(queue)
+            if cell != i:
+                alternative = -1
+                for m in self._neighbours(cell):
+                    if (m != next_step[cell] and m not in affected and not self._blocked(m)
+                            and distances[m] + cell_costs[m] == distance):
+                        alternative = m
+                        break
+                if alternative >= 0:
+                    next_step[cell] = alternative
+                    continue
+                affected.add(cell)
+            for n in self._neighbours(cell):
+                if next_step[n] == cell:
+                    heapq.heappush(queue, (distances[n], n))
+        return affected
+
+    def _reroute(self, affected):
+        """Reset the affected cells and re-seed them from the valid cells around them."""
+        if not affected:
+            return
+        for a in affected:
+            self.distances[a] = INFINITY
+            self.next[a] = -1
+
+        queue = []
+        for a in affected:
+            distance, n = self._best_neighbour(a, affected)
+            if distance < INFINITY:
+                self.distances[a] = distance
+                self.next[a] = n
+                queue.append((distance, a))
+        heapq.heapify(queue)
+        self._propagate(queue)
+
+    def distance(self, x, y):
+        """Cost of walking from (x, y) to the nearest goal, or infinity."""
+        return self.distances[y * self.width + x]
+
+    def next_step(self, x, y):
+        """The (x, y) cell to step to from (x, y), or None at a goal or dead end."""
+        n = self.next[y * self.width + x]
+        if n < 0:
+            return None
+        return (n % self.width, n // self.width)
@@ -1,31 +1,101 @@
 # game_state.py
-from unit import Unit
 import random
+from actions import plan_attack, plan_move
+from unit import Unit
+from ai import TacticalAI
+from combat_notification import CombatNotification, update_notifications
+from snapshot import capture_snapshot, restore_snapshot
+from profiler import profiler
 
 class GameState:
-    def __init__(self, grid, config, level_index=0):
+    def __init__(self, grid, config, level_index=0, verbose=True, unit_table=None, seed=None, undo=False):
         self.grid = grid
         self.config = config
         self.level_index = level_index
+        self.verbose = verbose  # Headless simulations turn console logging off
+        # Optional unit_table.UnitTable holding unit state in arrays for large armies
+        self.unit_table = unit_table
         self.units = []
-        self.player_units = []
-        self.enemy_units = []
         self.selected_unit = None
         self.cursor_x = 0
         self.cursor_y = 0
         self.current_turn = "player"  # "player" or "enemy"
+        self.turn_number = 1  # Incremented each time the player's turn comes around
         self.input_handler = None  # Will be set from main.py
+        self.enemy_ai = TacticalAI()  # Controller that plays the enemy side
+        # Optional ai_worker.AIWorker that plays enemy turns off the main thread
+        self.ai_worker = None
+        
+        # Every random decision in a match draws from this RNG so the seed reproduces it
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.rng = random.Random(self.seed)
+        # Optional replay.ReplayRecorder notified of every action
+        self.recorder = None
+        
+        # Bumped on attacks and turn changes; combined with grid.version in `version`
+        self._state_version = 0
+        # Memoized per-unit range/target queries, valid for _cache_version only
+        self._query_cache = {}
+        self._cache_version = None
+        
+        # Player undo/redo history for the current turn (snapshot.GameSnapshot entries).
+        # Only kept when undo is on: each entry costs a snapshot of every unit,
+        # which headless play, where nobody can undo, shouldn't pay for
+        self.undo_enabled = undo
+        self._undo_stack = []
+        self._redo_stack = []
         
         # Initialize units from level data
         self._initialize_units()
+        # Stable unit numbering (position in self.units) used by replays
+        self.unit_ids = {unit: i for i, unit in enumerate(self.units)}
         self.combat_notifications = []
 
+    @property
+    def player_units(self):
+        """Living player units on the board, kept up to date by the grid's unit index."""
+        return self.grid.unit_index.team(True)
+
+    @property
+    def enemy_units(self):
+        """Living enemy units on the board, kept up to date by the grid's unit index."""
+        return self.grid.unit_index.team(False)
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
+    @property
+    def version(self):
+        """Monotonically increasing board version.
+
+        Changes whenever a unit is placed, moved or removed (grid.version)
+        or an attack or turn change happens (_state_version).
+        """
+        return self.grid.version + self._state_version
+
+    def _bump_version(self):
+        self._state_version += 1
+
+    def _cached(self, kind, unit, compute):
+        """Return compute() memoized per (kind, unit) for the current board version."""
+        version = self.version
+        if version != self._cache_version:
+            self._query_cache.clear()
+            self._cache_version = version
+        
+        key = (kind, unit)
+        result = self._query_cache.get(key)
+        if result is None:
+            result = self._query_cache[key] = compute()
+        return result
+
     def _initialize_units(self):
         """Initialize units based on level configuration."""
         # Clear existing units
         self.units = []
-        self.player_units = []
-        self.enemy_units = []
+        
+        create_unit = self.unit_table.create_unit if self.unit_table is not None else Unit
         
         # Retrieve unit position data from grid
         player_positions = self.grid.get_player_start_positions()
@@ -37,15 +107,14 @@ class GameState:
                 x, y, unit_type = unit_data
                 
                 # Create unit with correct position and type
-                unit = Unit(unit_type, True, self.config, x, y)
+                unit = create_unit(unit_type, True, self.config, x, y)
                 self.units.append(unit)
-                self.player_units.append(unit)
                 
                 # Place unit on grid
                 self.grid.place_unit(unit, x, y)
-                print(f"Placed player {unit_type} at ({x}, {y})")
+                self._log(f"Placed player {unit_type} at ({x}, {y})")
             else:
-                print(f"Warning: Invalid player unit data format: {unit_data}")
+                self._log(f"Warning: Invalid player unit data format: {unit_data}")
         
         # Place enemy units from level configuration
         for unit_data in enemy_positions:
@@ -53,159 +122,153 @@ class GameState:
                 x, y, unit_type = unit_data
                 
                 # Create unit with correct position and type
-                unit = Unit(unit_type, False, self.config, x, y)
+                unit = create_unit(unit_type, False, self.config, x, y)
                 self.units.append(unit)
-                self.enemy_units.append(unit)
                 
                 # Place unit on grid
                 self.grid.place_unit(unit, x, y)
-                print(f"Placed enemy {unit_type} at ({x}, {y})")
+                self._log(f"Placed enemy {unit_type} at ({x}, {y})")
             else:
-                print(f"Warning: Invalid enemy unit data format: {unit_data}")
+                self._log(f"Warning: Invalid enemy unit data format: {unit_data}")
     
+    def get_winner(self):
+        """Return "player" or "enemy" once one side has been wiped out, otherwise None."""
+        if not self.player_units:
+            return "enemy"
+        if not self.enemy_units:
+            return "player"
+        return None
+
+    def is_game_over(self):
+        return self.get_winner() is not None
+
     def update(self):
         # Check for victory conditions
-        if not self.player_units:
-            print("Game over: The enemy has won!")
+        winner = self.get_winner()
+        if winner is not None and self.ai_worker is not None and self.ai_worker.running:
+            # A kill streamed from the worker decided the game; end its turn instead of waiting on it
+            self.ai_worker.cancel()
+
+        if winner == "enemy":
+            self._log("Game over: The enemy has won!")
             return
         
-        if not self.enemy_units:
-            print("Victory: You have defeated all enemies!")
+        if winner == "player":
+            self._log("Victory: You have defeated all enemies!")
             return
         
         # If it's the enemy's turn, let AI make moves
         if self.current_turn == "enemy":
-            self._enemy_turn()
+            if self.ai_worker is not None:
+                # Applies whatever the worker has decided so far; it ends the turn when done
+                self.ai_worker.update()
+            else:
+                self._enemy_turn()
 
-        self.combat_notifications = [n for n in self.combat_notifications if n.update()]
+        update_notifications(self.combat_notifications)
     
     def _enemy_turn(self):
-        # Simple AI that moves and attacks
-        for unit in self.enemy_units:
-            if not unit.is_alive():
-                continue
-                
-            # As long as the unit has movement points and hasn't attacked
-            while unit.can_move() and unit.current_move_points > 0:
-                # Find possible move targets within movement range based on current move points
-                move_cells = unit.get_move_range_cells(self.grid)
-                
-                if move_cells:
-                    # Choose a random move
-                    new_x, new_y = random.choice(move_cells)
-                    
-                    # Calculate movement cost
-                    movement_cost = unit.get_movement_cost_to(self.grid, new_x, new_y)
-                    
-                    # Skip if not enough movement points
-                    if movement_cost > unit.current_move_points:
-                        continue
-                        
-                    # Move the unit
-                    self.grid.move_unit(unit.x, unit.y, new_x, new_y)
-                    unit.move(movement_cost)
-                else:
-                    # No valid moves left
-                    break
-            
-            # Try to attack if possible
-            if unit.can_attack():
-                # Find targets in range
-                targets = []
-                for player_unit in self.player_units:
-                    if player_unit.is_alive() and unit.is_in_range(player_unit):
-                        targets.append(player_unit)
-                
-                if targets:
-                    # Attack a random target
-                    target = random.choice(targets)
-                    unit.attack(target)
-                    
-                    # Check if target was killed
-                    if not target.is_alive():
-                        self.player_units.remove(target)
+        # Let the enemy controller move and attack with every enemy unit
+        with profiler.span('enemy_turn'):
+            self.enemy_ai.take_turn(self, self.enemy_units, self.player_units)
                         
         # End the enemy turn
         self._end_turn()
     
     def select_unit_at_cursor(self):
-        cell = self.grid.get_cell(self.cursor_x, self.cursor_y)
-        if cell and cell['unit'] and cell['unit'].is_player:
-            self.selected_unit = cell['unit']
+        return self.select_unit_at(self.cursor_x, self.cursor_y)
+    
+    def select_unit_at(self, x, y):
+        unit = self.grid.get_unit(x, y)
+        if unit and unit.is_player:
+            self.selected_unit = unit
+            if self.recorder is not None:
+                self.recorder.record_select(self.unit_ids[unit])
             return True
         return False
     
+    def deselect_unit(self):
+        self.selected_unit = None
+        if self.recorder is not None:
+            self.recorder.record_deselect()
+    
+    def move_unit(self, unit, to_x, to_y, movement_cost):
+        """Move unit to (to_x, to_y), spending movement_cost move points.
+
+        The single entry point for moves by players and AI alike, so every
+        move reaches the recorder and, with undo on, is undoable during the
+        player's turn.
+        """
+        before = self.snapshot() if self.undo_enabled and self.current_turn == "player" else None
+        if not self.grid.move_unit(unit.x, unit.y, to_x, to_y):
+            return False
+        
+        # Reduce movement points by the cost
+        unit.move(movement_cost)
+        if before is not None:
+            self._push_undo(before)
+        if self.recorder is not None:
+            self.recorder.record_move(self.unit_ids[unit], to_x, to_y, movement_cost)
+        return True
+    
+    def apply(self, action):
+        """Perform a validated action (see actions.py) without searching again."""
+        return action.apply(self)
+    
     def move_selected_unit(self, to_x, to_y):
         """Move the selected unit to the specified coordinates if valid."""
-        if not self.selected_unit or not self.selected_unit.can_move():
+        if not self.selected_unit:
             return False
             
-        # Check if the move is within the unit's move range
-        move_cells = self.selected_unit.get_move_range_cells(self.grid)
-        if (to_x, to_y) in move_cells:
-            # Calculate the movement cost
-            movement_cost = self.selected_unit.get_movement_cost_to(self.grid, to_x, to_y)
-            
-            # Check if unit has enough movement points
-            if movement_cost > self.selected_unit.current_move_points:
-                print(f"Not enough movement points. Cost: {movement_cost}, Available: {self.selected_unit.current_move_points}")
-                return False
-                
-            from_x, from_y = self.selected_unit.x, self.selected_unit.y
-            if self.grid.move_unit(from_x, from_y, to_x, to_y):
-                # Reduce movement points by the cost
-                self.selected_unit.move(movement_cost)
-                print(f"Unit moved to {to_x}, {to_y}. Remaining move points: {self.selected_unit.current_move_points}")
-                return True
+        # Reachability already enforces the unit's remaining move points
+        action = plan_move(self.grid, self.selected_unit, to_x, to_y)
+        if action is not None and self.apply(action):
+            self._log(f"Unit moved to {to_x}, {to_y}. Remaining move points: {self.selected_unit.current_move_points}")
+            return True
         return False
 
     def attack_with_selected_unit(self, target_x, target_y):
         """Attack an enemy at the target coordinates."""
-        if not self.selected_unit or not self.selected_unit.can_attack():
-            return False
-            
-        # Get the target cell
-        cell = self.grid.get_cell(target_x, target_y)
-        if not cell or not cell['unit']:
+        if not self.selected_unit:
             return False
-            
-        # Check if target is an enemy unit
-        target = cell['unit']
-        if target.is_player == self.selected_unit.is_player:
+        
+        action = plan_attack(self.selected_unit, self.grid.get_unit(target_x, target_y))
+        return action is not None and self.apply(action)
+
+    def resolve_attack(self, attacker, target):
+        """Have attacker strike target, removing the target from play if it dies."""
+        before = self.snapshot() if self.undo_enabled and self.current_turn == "player" else None
+        if not attacker.attack(target):
             return False
+        self._bump_version()
+        if before is not None:
+            self._push_undo(before)
+        if self.recorder is not None:
+            self.recorder.record_attack(self.unit_ids[attacker], self.unit_ids[target])
+
+        # Log the attack
+        self._log(f"{attacker.unit_type} attacked {target.unit_type} for {attacker.strength} damage")
+        cell_size = self.grid.cell_size
+        self.add_combat_notification(f"-{attacker.strength}", target.x * cell_size + cell_size // 4,
+                                     target.y * cell_size, (255, 80, 80))
         
-        # Attempt the attack
-        if self.selected_unit.attack(target):
-            # Log the attack
-            print(f"{self.selected_unit.unit_type} attacked {target.unit_type} for {self.selected_unit.strength} damage")
-            
-            # Check if target was killed
-            if not target.is_alive():
-                print(f"{target.unit_type} was defeated!")
-                if target in self.enemy_units:
-                    self.enemy_units.remove(target)
-                elif target in self.player_units:
-                    self.player_units.remove(target)
-                    
-                # Remove the defeated unit from the grid
-                self.grid.remove_unit(target.x, target.y)
-            
-            return True
+        # Check if target was killed
+        if not target.is_alive():
+            self._log(f"{target.unit_type} was defeated!")
+                
+            # Removing the defeated unit from the grid also drops it from its team
+            self.grid.remove_unit(target.x, target.y)
         
-        return False
+        return True
 
     def get_attackable_enemies(self):
         """Return a list of enemy units that can be attacked by the selected unit."""
         if not self.selected_unit or not self.selected_unit.can_attack():
             return []
         
-        return self.selected_unit.get_valid_attack_targets(self.grid, self.enemy_units)
+        unit = self.selected_unit
+        return self._cached('targets', unit, lambda: unit.get_valid_attack_targets(self.grid, self.enemy_units))
 
-    def get_attack_range_cells(self):
-        """Return cells within attack range of selected unit."""
-        if not self.selected_unit or not self.selected_unit.can_attack():
-            return []
-        return self.selected_unit.get_attack_range_cells(self.grid)    
     def end_player_turn(self):
         if self.current_turn == "player":
             self._end_turn()
@@ -213,18 +276,67 @@ class GameState:
         return False
     
     def _end_turn(self):
+        if self.recorder is not None:
+            self.recorder.record_end_turn()
+        
         if self.current_turn == "player":
             # Switch to enemy turn
             self.current_turn = "enemy"
         else:
             # Switch to player turn and reset all units
             self.current_turn = "player"
-            for unit in self.units:
-                if unit.is_alive():
-                    unit.reset_turn()
+            self.turn_number += 1
+            if self.unit_table is not None:
+                self.unit_table.reset_side()
+            else:
+                for unit in self.units:
+                    if unit.is_alive():
+                        unit.reset_turn()
         
-        # Deselect unit when turn ends
+        # Deselect unit when turn ends; moves from a finished turn can't be undone
         self.selected_unit = None
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+        self._bump_version()
+    
+    def snapshot(self):
+        """Return an immutable, hashable snapshot of the board, units and turn."""
+        previous = self._undo_stack[-1] if self._undo_stack else None
+        return capture_snapshot(self, previous)
+    
+    def restore(self, state):
+        """Return the game to a snapshot taken from this GameState."""
+        restore_snapshot(self, state)
+    
+    def _push_undo(self, before):
+        self._undo_stack.append(before)
+        self._redo_stack.clear()
+    
+    def can_undo(self):
+        return bool(self._undo_stack)
+    
+    def can_redo(self):
+        return bool(self._redo_stack)
+    
+    def undo(self):
+        """Revert the last player move or attack this turn."""
+        if not self._undo_stack:
+            return False
+        if self.recorder is not None:
+            self.recorder.record_undo()
+        self._redo_stack.append(self.snapshot())
+        self.restore(self._undo_stack.pop())
+        return True
+    
+    def redo(self):
+        """Re-apply the last undone move or attack."""
+        if not self._redo_stack:
+            return False
+        if self.recorder is not None:
+            self.recorder.record_redo()
+        self._undo_stack.append(self.snapshot())
+        self.restore(self._redo_stack.pop())
+        return True
     
     def get_cursor_info(self):
         info = {}
@@ -245,15 +357,16 @@ class GameState:
         """Return cells within move range of selected unit."""
         if not self.selected_unit or not self.selected_unit.can_move():
             return []
-        return self.selected_unit.get_move_range_cells(self.grid)
+        unit = self.selected_unit
+        return self._cached('move', unit, lambda: unit.get_move_range_cells(self.grid))
     
     def get_attack_range_cells(self):
         """Return cells within attack range of selected unit."""
         if not self.selected_unit or not self.selected_unit.can_attack():
             return []
-        return self.selected_unit.get_attack_range_cells(self.grid)
+        unit = self.selected_unit
+        return self._cached('attack', unit, lambda: unit.get_attack_range_cells(self.grid))
 
-    # Add this method to GameState
     def add_combat_notification(self, message, x, y, color=(255, 255, 255)):
         """Add a temporary combat notification."""
         notification = CombatNotification(message, x, y, color)
@@ -1,6 +1,42 @@
 # grid.py
+from array import array
+from chunked_terrain import ChunkedTerrain
+from pathfinding import PathCache
+from unit_index import UnitIndex
+
+
+def layout_key(layout, terrain_mapping, terrain_types):
+    """Everything a layout's terrain IDs depend on, for checking a compiled terrain_grid."""
+    return tuple(layout), tuple(terrain_mapping.items()), tuple(terrain_types)
+
+
+class SparseOccupancy:
+    """Grid.occupants for chunked maps: a dict of occupied cells behind list-style indexing."""
+    __slots__ = ('_units',)
+
+    def __init__(self):
+        self._units = {}
+
+    def __getitem__(self, i):
+        return self._units.get(i)
+
+    def __setitem__(self, i, unit):
+        if unit is None:
+            self._units.pop(i, None)
+        else:
+            self._units[i] = unit
+
+    def __len__(self):
+        return len(self._units)
+
+
 class Grid:
-    def __init__(self, config, level_index=0):
+    def __init__(self, config, level_index=0, terrain=None):
+        """Build the grid for a level.
+
+        terrain may be a ChunkedTerrain to use instead of the level layout;
+        a level with a terrain_file entry opens one automatically.
+        """
         self.cell_size = config['game']['grid']['cell_size']
         self.terrain_types = config['terrain_types']
         self.terrain_mapping = config['terrain_mapping']
@@ -8,60 +44,165 @@ class Grid:
         # Load level data
         self.levels = config['levels']
         self.current_level = self.levels[level_index]
-        self.layout = self.current_level['layout']
+        self.layout = self.current_level.get('layout', [])
+        if terrain is None and self.current_level.get('terrain_file'):
+            terrain = ChunkedTerrain(self.current_level['terrain_file'])
+        
+        # Set grid dimensions based on level layout (or the terrain file)
+        if terrain is not None:
+            self.width, self.height = terrain.width, terrain.height
+        else:
+            self.height = len(self.layout)
+            self.width = len(self.layout[0]) if self.layout else 0
+        
+        # Terrain types get integer IDs in config order, with a cost table indexed by ID
+        self.terrain_names = list(self.terrain_types.keys())
+        self.terrain_ids = {name: i for i, name in enumerate(self.terrain_names)}
+        self.terrain_costs = [self.terrain_types[name]['movement_cost'] for name in self.terrain_names]
+        # Lower bound on the cost of any step, used by the A* heuristic
+        self.min_terrain_cost = max(0, min(self.terrain_costs, default=0))
+        
+        # Flat per-cell storage indexed by y * width + x (see index()):
+        #   terrain     - terrain ID of each cell
+        #   cell_costs  - movement cost of entering each cell
+        #   occupants   - unit standing on each cell, or None
+        # Pathfinding reads these directly instead of going through get_cell().
+        self.terrain = array('B')
+        self.cell_costs = array('i' if all(isinstance(c, int) for c in self.terrain_costs) else 'd')
+        self.occupants = []
+        if terrain is not None:
+            # Chunks are loaded on demand and occupancy is sparse, so memory
+            # follows the area in use rather than the map size
+            terrain.bind(self.terrain_names, self.terrain_costs)
+            self.terrain = terrain
+            self.cell_costs = terrain.costs
+            self.occupants = SparseOccupancy()
+        else:
+            self._initialize_grid_from_layout()
+        
+        # Team membership and range queries over the units on the grid
+        self.unit_index = UnitIndex(self.width, self.height)
         
-        # Set grid dimensions based on level layout
-        self.height = len(self.layout)
-        self.width = len(self.layout[0]) if self.layout else 0
+        # Bumped whenever occupancy changes so cached searches know to recompute
+        self.version = 0
         
-        # Initialize the grid from the level layout
-        self.cells = []
-        self._initialize_grid_from_layout()
+        # Long-distance routes between cells, valid for the current version
+        self.path_cache = PathCache()
+        
+        # Called as listener(x, y) after a cell gains or loses a unit (flow fields)
+        self.listeners = []
         
     
     def _initialize_grid_from_layout(self):
-        # Create the grid cells from the layout
-        self.cells = []
+        # Create the terrain arrays from the layout, or from the terrain IDs
+        # config_loader already resolved it to if it was built from this layout
+        level = self.current_level
+        compiled = level.get('terrain_grid')
+        if compiled is not None and level.get('terrain_source') == layout_key(
+                self.layout, self.terrain_mapping, self.terrain_types):
+            terrain = array('B', compiled)
+        else:
+            terrain = self._parse_layout()
+        
+        self.terrain = terrain
+        self.cell_costs = array(self.cell_costs.typecode, [self.terrain_costs[t] for t in terrain])
+        self.occupants = [None] * (self.width * self.height)
+    
+    def _parse_layout(self):
+        default_id = 0  # Unknown characters fall back to the first terrain type
         
-        for y, row in enumerate(self.layout):
-            grid_row = []
-            for x, char in enumerate(row):
-                # Get the terrain type from the mapping
-                terrain_type = self.terrain_mapping.get(char, list(self.terrain_types.keys())[0])
-                grid_row.append({'terrain': terrain_type, 'unit': None})
-            self.cells.append(grid_row)
+        terrain = array('B')
+        for row in self.layout:
+            # Rows are clipped/padded to the grid width so the arrays stay rectangular
+            row = row[:self.width].ljust(self.width, ' ')
+            for char in row:
+                terrain_type = self.terrain_mapping.get(char)
+                terrain.append(self.terrain_ids[terrain_type] if terrain_type in self.terrain_ids else default_id)
+        return terrain
+    
+    @property
+    def is_chunked(self):
+        """True when terrain is a ChunkedTerrain, loaded a chunk at a time."""
+        return isinstance(self.terrain, ChunkedTerrain)
+    
+    def index(self, x, y):
+        """Return the flat array index of (x, y)."""
+        return y * self.width + x
     
     def get_cell(self, x, y):
+        """Return a {'terrain': name, 'unit': unit} view of the cell, or None if out of bounds."""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            i = y * self.width + x
+            return {'terrain': self.terrain_names[self.terrain[i]], 'unit': self.occupants[i]}
+        return None
+    
+    def get_unit(self, x, y):
         if 0 <= x < self.width and 0 <= y < self.height:
-            return self.cells[y][x]
+            return self.occupants[y * self.width + x]
         return None
     
     def place_unit(self, unit, x, y):
         if 0 <= x < self.width and 0 <= y < self.height:
-            self.cells[y][x]['unit'] = unit
+            i = y * self.width + x
+            if self.occupants[i] is not None and self.occupants[i] is not unit:
+                self.unit_index.remove(self.occupants[i])
+            self.occupants[i] = unit
             unit.x, unit.y = x, y
+            self.unit_index.add(unit, x, y)
+            self.version += 1
+            self._notify(x, y)
             return True
         return False
     
     def remove_unit(self, x, y):
         if 0 <= x < self.width and 0 <= y < self.height:
-            self.cells[y][x]['unit'] = None
+            i = y * self.width + x
+            if self.occupants[i] is not None:
+                self.unit_index.remove(self.occupants[i])
+            self.occupants[i] = None
+            self.version += 1
+            self._notify(x, y)
             return True
         return False
     
     def move_unit(self, from_x, from_y, to_x, to_y):
-        if self.cells[from_y][from_x]['unit'] and not self.cells[to_y][to_x]['unit']:
-            unit = self.cells[from_y][from_x]['unit']
-            self.cells[to_y][to_x]['unit'] = unit
-            self.cells[from_y][from_x]['unit'] = None
+        from_i = from_y * self.width + from_x
+        to_i = to_y * self.width + to_x
+        if self.occupants[from_i] and not self.occupants[to_i]:
+            unit = self.occupants[from_i]
+            self.occupants[to_i] = unit
+            self.occupants[from_i] = None
             unit.x, unit.y = to_x, to_y
+            self.unit_index.move(unit, to_x, to_y)
+            self.version += 1
+            self._notify(from_x, from_y)
+            self._notify(to_x, to_y)
             return True
         return False
     
+    def add_listener(self, listener):
+        """Call listener(x, y) whenever a cell's occupant changes."""
+        self.listeners.append(listener)
+    
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+    
+    def _notify(self, x, y):
+        for listener in self.listeners:
+            listener(x, y)
+    
+    def get_units_within(self, x, y, radius, is_player=None):
+        """Return the units within Manhattan distance radius of (x, y), optionally of one side."""
+        return self.unit_index.units_within(x, y, radius, is_player)
+    
+    def get_units_in_rect(self, x0, y0, x1, y1):
+        """Return the units inside the cell rectangle [x0, x1) x [y0, y1)."""
+        return self.unit_index.units_in_rect(x0, y0, x1, y1)
+    
     def get_terrain_info(self, x, y):
-        cell = self.get_cell(x, y)
-        if cell:
-            terrain_type = cell['terrain']
+        if 0 <= x < self.width and 0 <= y < self.height:
+            terrain_type = self.terrain_names[self.terrain[y * self.width + x]]
             return {
                 'name': terrain_type,
                 'description': self.terrain_types[terrain_type]['description'],
@@ -0,0 +1,350 @@
+# hpa.py
+"""Hierarchical pathfinding (HPA*) for long routes on large grids.
+
+The map is cut into square sectors. Wherever two neighbouring sectors share
+a run of free border cells there is an entrance: one crossing in the middle
+of short runs, one at each end of long ones. Inside every sector the cost
+between each pair of its entrance cells is found by a Dijkstra that stays
+within the sector. Together these form a small abstract graph.
+
+A query connects the start and target to the entrances of their sectors,
+runs A* over the abstract graph and then refines each abstract edge with a
+search confined to one sector, so its cost grows with the number of sectors
+the route crosses rather than with the area of the map. Sector costs are
+only computed once a search reaches the sector. Routes are close to optimal
+but not guaranteed optimal; short ones (within two sectors) are handed to
+the exact pathfinding.find_path.
+
+Occupancy follows the same rules as find_path: units block, except that
+the target may be occupied. The pathfinder listens to the grid and only
+rebuilds the sectors and borders around cells whose occupant changed; call
+invalidate(x, y) after changing a cell's terrain.
+
+No controller routes with it yet: the shipped levels are small enough for
+pathfinding.find_path, so only benchmark.py (hpa_path) builds one. Its first
+query builds every border, so it isn't suited to chunked maps either.
+"""
+import heapq
+
+from pathfinding import DIRECTIONS, find_path
+
+INFINITY = float('inf')
+
+# Runs of free border cells at least this long get a crossing at each end
+LONG_ENTRANCE = 6
+
+
+class HierarchicalPathfinder:
+    def __init__(self, grid, sector_size=16):
+        self.grid = grid
+        self.sector_size = sector_size
+        self.columns = (grid.width + sector_size - 1) // sector_size
+        self.rows = (grid.height + sector_size - 1) // sector_size
+
+        # Abstract graph
+        self.crossings = {}  # cell -> {cell in the neighbouring sector: cost of stepping there}
+        self.nodes = [set() for _ in range(self.columns * self.rows)]  # Entrance cells per sector
+        self.edges = [{} for _ in range(self.columns * self.rows)]  # Per sector: cell -> [(cell, cost)]
+        self._border_crossings = {}  # (sector, sector) -> [(cell, cell)]
+
+        # Borders are built on the first query, sectors when a search first reaches them
+        self._dirty_borders = set(self._all_borders())
+        self._dirty_sectors = set(range(self.columns * self.rows))
+
+        grid.add_listener(self.invalidate)
+
+    def close(self):
+        """Stop listening to the grid."""
+        self.grid.remove_listener(self.invalidate)
+
+    def _all_borders(self):
+        for sy in range(self.rows):
+            for sx in range(self.columns):
+                s = sy * self.columns + sx
+                if sx + 1 < self.columns:
+                    yield (s, s + 1)
+                if sy + 1 < self.rows:
+                    yield (s, s + self.columns)
+
+    def sector_of(self, x, y):
+        return (y // self.sector_size) * self.columns + x // self.sector_size
+
+    def _bounds(self, sector):
+        """Return (x0, y0, x1, y1) of a sector, exclusive at the high end."""
+        size = self.sector_size
+        x0 = (sector % self.columns) * size
+        y0 = (sector // self.columns) * size
+        return x0, y0, min(x0 + size, self.grid.width), min(y0 + size, self.grid.height)
+
+    def invalidate(self, x, y):
+        """Mark the sector holding (x, y), and any border it lies on, for rebuilding."""
+        size = self.sector_size
+        s = self.sector_of(x, y)
+        self._dirty_sectors.add(s)
+
+        sx, sy = x // size, y // size
+        if x % size == 0 and sx > 0:
+            self._dirty_borders.add((s - 1, s))
+        if x % size == size - 1 and sx + 1 < self.columns:
+            self._dirty_borders.add((s, s + 1))
+        if y % size == 0 and sy > 0:
+            self._dirty_borders.add((s - self.columns, s))
+        if y % size == size - 1 and sy + 1 < self.rows:
+            self._dirty_borders.add((s, s + self.columns))
+
+    def _refresh(self):
+        """Rebuild the borders that changed since the last query."""
+        for border in self._dirty_borders:
+            self._build_border(*border)
+            # The sectors on both sides now have different entrances
+            self._dirty_sectors.update(border)
+        self._dirty_borders.clear()
+
+    def _sector_edges(self, sector):
+        """The sector's entrance-to-entrance costs, rebuilt first if it changed."""
+        if sector in self._dirty_sectors:
+            self._dirty_sectors.discard(sector)
+            self._build_sector(sector)
+        return self.edges[sector]
+
+    def _build_border(self, a, b):
+        """Find the entrances between sector a and the sector b right of or below it."""
+        # Drop the old crossings
+        for cell_a, cell_b in self._border_crossings.pop((a, b), ()):
+            self._remove_crossing(cell_a, cell_b, a)
+            self._remove_crossing(cell_b, cell_a, b)
+
+        grid = self.grid
+        width = grid.width
+        occupants = grid.occupants
+        ax0, ay0, ax1, ay1 = self._bounds(a)
+        if b == a + 1:
+            # Vertical border: a's last column against b's first
+            pairs = [(y * width + ax1 - 1, y * width + ax1) for y in range(ay0, ay1)]
+        else:
+            # Horizontal border: a's last row against b's first
+            pairs = [((ay1 - 1) * width + x, ay1 * width + x) for x in range(ax0, ax1)]
+
+        # Split into runs where both sides are free
+        runs = []
+        run = []
+        for cell_a, cell_b in pairs:
+            if occupants[cell_a] is None and occupants[cell_b] is None:
+                run.append((cell_a, cell_b))
+            elif run:
+                runs.append(run)
+                run = []
+        if run:
+            runs.append(run)
+
+        crossings = []
+        for run in runs:
+            if len(run) >= LONG_ENTRANCE:
+                crossings.extend((run[0], run[-1]))
+            else:
+                crossings.append(run[len(run) // 2])
+
+        cell_costs = grid.cell_costs
+        for cell_a, cell_b in crossings:
+            self.crossings.setdefault(cell_a, {})[cell_b] = cell_costs[cell_b]
+            self.crossings.setdefault(cell_b, {})[cell_a] = cell_costs[cell_a]
+            self.nodes[a].add(cell_a)
+            self.nodes[b].add(cell_b)
+        self._border_crossings[(a, b)] = crossings
+
+    def _remove_crossing(self, cell, other, sector):
+        targets = self.crossings.get(cell)
+        if targets is None:
+            return
+        targets.pop(other, None)
+        if not targets:
+            del self.crossings[cell]
+            self.nodes[sector].discard(cell)
+
+    def _build_sector(self, sector):
+        """Recompute the costs between every pair of entrances of a sector."""
+        bounds = self._bounds(sector)
+        nodes = self.nodes[sector]
+        edges = self.edges[sector] = {}
+        for node in nodes:
+            costs, _prev = self._search(node, bounds)
+            edges[node] = [(other, costs[other]) for other in nodes if other != node and other in costs]
+
+    def _search(self, start, bounds, target=None):
+        """Dijkstra from start that stays inside bounds; returns (costs, prev).
+
+        Occupied cells block except target, which can be reached but not passed through.
+        """
+        grid = self.grid
+        width = grid.width
+        cell_costs = grid.cell_costs
+        occupants = grid.occupants
+        x0, y0, x1, y1 = bounds
+
+        costs = {start: 0}
+        prev = {start: None}
+        queue = [(0, start)]
+        while queue:
+            cost, i = heapq.heappop(queue)
+            if i == target or cost > costs[i]:
+                continue
+            x, y = i % width, i // width
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if not (x0 <= nx < x1 and y0 <= ny < y1):
+                    continue
+                ni = ny * width + nx
+                if occupants[ni] is not None and ni != target:
+                    continue
+                new_cost = cost + cell_costs[ni]
+                if new_cost < costs.get(ni, INFINITY):
+                    costs[ni] = new_cost
+                    prev[ni] = i
+                    heapq.heappush(queue, (new_cost, ni))
+        return costs, prev
+
+    def _search_to(self, target, bounds):
+        """Reverse Dijkstra inside bounds; returns (costs to reach target, next cell toward it)."""
+        grid = self.grid
+        width = grid.width
+        cell_costs = grid.cell_costs
+        occupants = grid.occupants
+        x0, y0, x1, y1 = bounds
+
+        costs = {target: 0}
+        next_cell = {target: None}
+        queue = [(0, target)]
+        while queue:
+            cost, i = heapq.heappop(queue)
+            if cost > costs[i]:
+                continue
+            # Only the target itself may be occupied
+            if i != target and occupants[i] is not None:
+                continue
+            step = cost + cell_costs[i]
+            x, y = i % width, i // width
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if not (x0 <= nx < x1 and y0 <= ny < y1):
+                    continue
+                ni = ny * width + nx
+                if step < costs.get(ni, INFINITY):
+                    costs[ni] = step
+                    next_cell[ni] = i
+                    heapq.heappush(queue, (step, ni))
+        return costs, next_cell
+
+    def find_path(self, start_x, start_y, target_x, target_y):
+        """Route between two cells; returns (cost, path) or (infinity, None) like pathfinding.find_path."""
+        # Short routes are where sectors distort the most, and plain A* is cheap there
+        if abs(target_x - start_x) + abs(target_y - start_y) <= 2 * self.sector_size:
+            return find_path(self.grid, start_x, start_y, target_x, target_y)
+
+        self._refresh()
+        grid = self.grid
+        width = grid.width
+        start = start_y * width + start_x
+        target = target_y * width + target_x
+
+        start_sector = self.sector_of(start_x, start_y)
+        target_sector = self.sector_of(target_x, target_y)
+        start_costs, start_prev = self._search(start, self._bounds(start_sector), target)
+        target_costs, target_next = self._search_to(target, self._bounds(target_sector))
+
+        # A route that never leaves the sector
+        best_cost = start_costs.get(target, INFINITY) if start_sector == target_sector else INFINITY
+        abstract = self._abstract_search(start, target, start_costs, target_costs, best_cost)
+        if abstract is None:
+            if best_cost == INFINITY:
+                return INFINITY, None
+            return best_cost, self._walk_back(start_prev, start, target)
+
+        cost, nodes = abstract
+        # Refine each abstract edge with a search inside one sector
+        path = self._walk_back(start_prev, start, nodes[0])
+        for a, b in zip(nodes, nodes[1:]):
+            if b in self.crossings.get(a, ()):
+                path.append((b % width, b // width))
+            else:
+                ax, ay = a % width, a // width
+                _costs, prev = self._search(a, self._bounds(self.sector_of(ax, ay)), b)
+                path.extend(self._walk_back(prev, a, b))
+        i = nodes[-1]
+        while i != target:
+            i = target_next[i]
+            path.append((i % width, i // width))
+        return cost, path
+
+    def _abstract_search(self, start, target, start_costs, target_costs, limit):
+        """A* over the entrances; returns (cost, [entrance cells]) cheaper than limit, or None."""
+        grid = self.grid
+        width = grid.width
+        min_cost = grid.min_terrain_cost
+        tx, ty = target % width, target // width
+
+        def heuristic(i):
+            return (abs(tx - i % width) + abs(ty - i // width)) * min_cost
+
+        start_nodes = self.nodes[self.sector_of(start % width, start // width)]
+        costs = {}
+        prev = {}
+        queue = []
+        for node in start_nodes:
+            if node in start_costs:
+                costs[node] = start_costs[node]
+                prev[node] = None
+                heapq.heappush(queue, (costs[node] + heuristic(node), node))
+
+        best = None
+        while queue:
+            f, node = heapq.heappop(queue)
+            if f >= limit:
+                break
+            cost = costs[node]
+            if f > cost + heuristic(node):
+                continue
+
+            # Finishing from here goes through the target sector's reverse search
+            if node in target_costs and cost + target_costs[node] < limit:
+                limit = cost + target_costs[node]
+                best = node
+
+            for other, step in self._sector_edges(self.sector_of(node % width, node // width)).get(node, ()):
+                self._relax(queue, costs, prev, node, other, cost + step, heuristic)
+            for other, step in self.crossings.get(node, {}).items():
+                self._relax(queue, costs, prev, node, other, cost + step, heuristic)
+
+        if best is None:
+            return None
+        nodes = []
+        node = best
+        while node is not None:
+            nodes.append(node)
+            node = prev[node]
+        nodes.reverse()
+        return limit, nodes
+
+    @staticmethod
+    def _relax(queue, costs, prev, node, other, new_cost, heuristic):
+        if new_cost < costs.get(other, INFINITY):
+            costs[other] = new_cost
+            prev[other] = node
+            heapq.heappush(queue, (new_cost + heuristic(other), other))
+
+    def _walk_back(self, prev, start, end):
+        """(x, y) steps from start (exclusive) to end following a search's prev links."""
+        width = self.grid.width
+        path = []
+        i = end
+        while i != start:
+            path.append((i % width, i // width))
+            i = prev[i]
+        path.reverse()
+        return path
+
+    def get_stats(self):
+        return {
+            'sectors': self.columns * self.rows,
+            'entrances': len(self.crossings),
+            'edges': sum(len(e) for edges in self.edges for e in edges.values())
+        }
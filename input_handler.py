@@ -1,5 +1,46 @@
 # input_handler.py
 import pygame
+from actions import plan_attack, plan_move
+from profiler import profiler
+
+# Map string key names to pygame key constants (built once at import)
+KEY_CONSTANTS = {
+    # Arrow keys
+    "UP": pygame.K_UP,
+    "DOWN": pygame.K_DOWN,
+    "LEFT": pygame.K_LEFT,
+    "RIGHT": pygame.K_RIGHT,
+    
+    # Letter keys
+    "a": pygame.K_a, "b": pygame.K_b, "c": pygame.K_c, "d": pygame.K_d,
+    "e": pygame.K_e, "f": pygame.K_f, "g": pygame.K_g, "h": pygame.K_h,
+    "i": pygame.K_i, "j": pygame.K_j, "k": pygame.K_k, "l": pygame.K_l,
+    "m": pygame.K_m, "n": pygame.K_n, "o": pygame.K_o, "p": pygame.K_p,
+    "q": pygame.K_q, "r": pygame.K_r, "s": pygame.K_s, "t": pygame.K_t,
+    "u": pygame.K_u, "v": pygame.K_v, "w": pygame.K_w, "x": pygame.K_x,
+    "y": pygame.K_y, "z": pygame.K_z,
+    
+    # Number keys
+    "0": pygame.K_0, "1": pygame.K_1, "2": pygame.K_2, "3": pygame.K_3,
+    "4": pygame.K_4, "5": pygame.K_5, "6": pygame.K_6, "7": pygame.K_7,
+    "8": pygame.K_8, "9": pygame.K_9,
+    
+    # Special keys
+    "SPACE": pygame.K_SPACE,
+    "RETURN": pygame.K_RETURN,
+    "ESCAPE": pygame.K_ESCAPE,
+    "TAB": pygame.K_TAB,
+    "BACKSPACE": pygame.K_BACKSPACE,
+    "SHIFT": pygame.K_LSHIFT,
+    "CTRL": pygame.K_LCTRL,
+    "ALT": pygame.K_LALT,
+    
+    # Function keys
+    "F1": pygame.K_F1, "F2": pygame.K_F2, "F3": pygame.K_F3, "F4": pygame.K_F4,
+    "F5": pygame.K_F5, "F6": pygame.K_F6, "F7": pygame.K_F7, "F8": pygame.K_F8,
+    "F9": pygame.K_F9, "F10": pygame.K_F10, "F11": pygame.K_F11, "F12": pygame.K_F12,
+}
+
 
 class InputHandler:
     def __init__(self, game_state, config):
@@ -15,52 +56,21 @@ class InputHandler:
     def _initialize_key_map(self):
         key_map = {}
         
-        # Map string key names to pygame key constants
-        key_constants = {
-            # Arrow keys
-            "UP": pygame.K_UP,
-            "DOWN": pygame.K_DOWN,
-            "LEFT": pygame.K_LEFT,
-            "RIGHT": pygame.K_RIGHT,
-            
-            # Letter keys
-            "a": pygame.K_a, "b": pygame.K_b, "c": pygame.K_c, "d": pygame.K_d,
-            "e": pygame.K_e, "f": pygame.K_f, "g": pygame.K_g, "h": pygame.K_h,
-            "i": pygame.K_i, "j": pygame.K_j, "k": pygame.K_k, "l": pygame.K_l,
-            "m": pygame.K_m, "n": pygame.K_n, "o": pygame.K_o, "p": pygame.K_p,
-            "q": pygame.K_q, "r": pygame.K_r, "s": pygame.K_s, "t": pygame.K_t,
-            "u": pygame.K_u, "v": pygame.K_v, "w": pygame.K_w, "x": pygame.K_x,
-            "y": pygame.K_y, "z": pygame.K_z,
-            
-            # Number keys
-            "0": pygame.K_0, "1": pygame.K_1, "2": pygame.K_2, "3": pygame.K_3,
-            "4": pygame.K_4, "5": pygame.K_5, "6": pygame.K_6, "7": pygame.K_7,
-            "8": pygame.K_8, "9": pygame.K_9,
-            
-            # Special keys
-            "SPACE": pygame.K_SPACE,
-            "RETURN": pygame.K_RETURN,
-            "ESCAPE": pygame.K_ESCAPE,
-            "TAB": pygame.K_TAB,
-            "BACKSPACE": pygame.K_BACKSPACE,
-            "SHIFT": pygame.K_LSHIFT,
-            "CTRL": pygame.K_LCTRL,
-            "ALT": pygame.K_LALT,
-            "ESCAPE": pygame.K_ESCAPE,
-        }
-        
         # Map action names to pygame key constants using config
         controls = self.config["controls"]
         
-        key_map["cursor_up"] = key_constants.get(controls["cursor_up"], pygame.K_UP)
-        key_map["cursor_down"] = key_constants.get(controls["cursor_down"], pygame.K_DOWN)
-        key_map["cursor_left"] = key_constants.get(controls["cursor_left"], pygame.K_LEFT)
-        key_map["cursor_right"] = key_constants.get(controls["cursor_right"], pygame.K_RIGHT)
-        key_map["select_action"] = key_constants.get(controls["select_action"], pygame.K_SPACE)
-        key_map["move_action"] = key_constants.get(controls["move_action"], pygame.K_m)
-        key_map["attack_action"] = key_constants.get(controls["attack_action"], pygame.K_a)
-        key_map["pass_turn"] = key_constants.get(controls["pass_turn"], pygame.K_p)
-        key_map["quit_game"] = key_constants.get(controls.get("quit_game", "ESCAPE"), pygame.K_ESCAPE)
+        key_map["cursor_up"] = KEY_CONSTANTS.get(controls["cursor_up"], pygame.K_UP)
+        key_map["cursor_down"] = KEY_CONSTANTS.get(controls["cursor_down"], pygame.K_DOWN)
+        key_map["cursor_left"] = KEY_CONSTANTS.get(controls["cursor_left"], pygame.K_LEFT)
+        key_map["cursor_right"] = KEY_CONSTANTS.get(controls["cursor_right"], pygame.K_RIGHT)
+        key_map["select_action"] = KEY_CONSTANTS.get(controls["select_action"], pygame.K_SPACE)
+        key_map["move_action"] = KEY_CONSTANTS.get(controls["move_action"], pygame.K_m)
+        key_map["attack_action"] = KEY_CONSTANTS.get(controls["attack_action"], pygame.K_a)
+        key_map["pass_turn"] = KEY_CONSTANTS.get(controls["pass_turn"], pygame.K_p)
+        key_map["quit_game"] = KEY_CONSTANTS.get(controls.get("quit_game", "ESCAPE"), pygame.K_ESCAPE)
+        key_map["undo"] = KEY_CONSTANTS.get(controls.get("undo", "u"), pygame.K_u)
+        key_map["redo"] = KEY_CONSTANTS.get(controls.get("redo", "r"), pygame.K_r)
+        key_map["toggle_profiler"] = KEY_CONSTANTS.get(controls.get("toggle_profiler", "F3"), pygame.K_F3)
         
         return key_map
     
@@ -69,6 +79,10 @@ class InputHandler:
             if event.key == self.key_map["quit_game"]:
                 self.quit_requested = True
                 return
+            if event.key == self.key_map["toggle_profiler"]:
+                # Works on either side's turn so enemy turns can be profiled too
+                profiler.toggle_overlay()
+                return
         if self.game_state.current_turn != "player":
             return  # Only process input during player's turn
             
@@ -91,7 +105,7 @@ class InputHandler:
                     self.action_mode = "select"
                 # If no unit selected, or if we have a unit and we're clicking on empty space, deselect
                 elif self.game_state.selected_unit:
-                    self.game_state.selected_unit = None
+                    self.game_state.deselect_unit()
                     self.action_mode = "select"
                     print("Unit deselected")
                 
@@ -111,25 +125,13 @@ class InputHandler:
                     print("Unit has no movement points left")
                     return
                     
-                # Get all valid move cells based on remaining movement points
-                move_cells = self.game_state.selected_unit.get_move_range_cells(self.game_state.grid)
+                # One reachability lookup validates the move and prices it
+                action = plan_move(self.game_state.grid, self.game_state.selected_unit,
+                                   self.game_state.cursor_x, self.game_state.cursor_y)
                 
-                # Check if cursor is on a valid move cell
-                if (self.game_state.cursor_x, self.game_state.cursor_y) in move_cells:
-                    # Calculate the movement cost
-                    movement_cost = self.game_state.selected_unit.get_movement_cost_to(
-                        self.game_state.grid, 
-                        self.game_state.cursor_x, 
-                        self.game_state.cursor_y
-                    )
-                    
-                    # Check if unit has enough movement points
-                    if movement_cost > self.game_state.selected_unit.current_move_points:
-                        print(f"Not enough movement points. Cost: {movement_cost}, Available: {self.game_state.selected_unit.current_move_points}")
-                        return
-                    
+                if action is not None:
                     # Attempt the move
-                    if self.game_state.move_selected_unit(self.game_state.cursor_x, self.game_state.cursor_y):
+                    if self.game_state.apply(action):
                         print(f"Unit moved. Remaining points: {self.game_state.selected_unit.current_move_points}")
                     else:
                         print("Move failed")
@@ -146,19 +148,17 @@ class InputHandler:
                     print("Unit cannot attack - already attacked this turn")
                     return
                     
-                # Get cell at cursor position
-                cursor_x, cursor_y = self.game_state.cursor_x, self.game_state.cursor_y
-                cell = self.game_state.grid.get_cell(cursor_x, cursor_y)
+                # Get unit at cursor position
+                target = self.game_state.grid.get_unit(self.game_state.cursor_x, self.game_state.cursor_y)
                 
-                # Check if there's a unit at cursor position
-                if cell and cell['unit'] and not cell['unit'].is_player:
-                    # Get attack range cells
-                    attack_range = self.game_state.get_attack_range_cells()
+                # Check if there's an enemy unit at cursor position
+                if target and not target.is_player:
+                    action = plan_attack(self.game_state.selected_unit, target)
                     
                     # Check if target is in range
-                    if (cursor_x, cursor_y) in attack_range:
+                    if action is not None:
                         # Attempt the attack
-                        if self.game_state.attack_with_selected_unit(cursor_x, cursor_y):
+                        if self.game_state.apply(action):
                             print("Attack successful!")
                             # Play sound or animation here if desired
                         else:
@@ -170,3 +170,11 @@ class InputHandler:
 
             elif event.key == self.key_map["pass_turn"]:
               self.game_state.end_player_turn()
+
+            elif event.key == self.key_map["undo"]:
+                if self.game_state.undo():
+                    print("Undid last action")
+
+            elif event.key == self.key_map["redo"]:
+                if self.game_state.redo():
+                    print("Redid last action")
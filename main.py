@@ -1,20 +1,39 @@
 # main.py
 import pygame
-import yaml
 import sys
+from ai_worker import AIWorker
+from config_loader import load_config
 from grid import Grid
 from game_state import GameState
 from input_handler import InputHandler
+from profiler import profiler
 from renderer import Renderer
+from replay import ReplayRecorder
+
+# How long an idle event-driven loop sleeps waiting for input, in milliseconds
+IDLE_WAIT_MS = 500
+
+# Window events after which the whole screen has to be redrawn
+EXPOSE_EVENTS = {pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED,
+                 pygame.WINDOWSIZECHANGED, pygame.WINDOWSHOWN}
+
 
 class DictToObject:
   def __init__(self, dictionary):
     self.__dict__.update(dictionary)
 
 
-def load_config(config_file="config.yaml"):
-    with open(config_file, 'r') as file:
-        return yaml.safe_load(file)
+def frame_key(game_state, input_handler):
+    """Everything a static frame depends on; the frame only needs redrawing when this changes."""
+    return (game_state.version, game_state.current_turn, game_state.cursor_x, game_state.cursor_y,
+            game_state.selected_unit, input_handler.action_mode, profiler.overlay_visible)
+
+
+def is_animating(game_state):
+    """True while something changes without input, so the loop has to keep ticking."""
+    return (bool(game_state.combat_notifications) or game_state.current_turn == "enemy"
+            or profiler.overlay_visible)
+
 
 def main():
     # Load configuration
@@ -32,34 +51,84 @@ def main():
     
     # Create game components with level data
     grid = Grid(config, level_index)
-    game_state = GameState(grid, config, level_index)
+    # Only the interactive game keeps undo history; headless play skips its snapshots
+    game_state = GameState(grid, config, level_index, undo=True)
     input_handler = InputHandler(game_state, config)
     game_state.input_handler = input_handler
     renderer = Renderer(screen, game_state, config)
     
-    # Game loop
+    # Optionally play enemy turns on a background thread so the window never freezes
+    ai_worker = None
+    if config['game'].get('ai_worker', False):
+        ai_worker = game_state.ai_worker = AIWorker(game_state)
+    
+    # Optionally record the match for headless playback with replay.py
+    replay_file = config['game'].get('replay_file')
+    recorder = None
+    if replay_file:
+        recorder = ReplayRecorder()
+        recorder.attach(game_state)
+    
+    # Frame profiler (toggle the overlay in game with the toggle_profiler key)
+    profiler_config = config.get('profiler', {})
+    trace_file = profiler_config.get('trace_file')
+    profiler.configure(enabled=profiler_config.get('enabled', False),
+                       overlay=profiler_config.get('overlay', False),
+                       tracing=bool(trace_file))
+    
+    # Game loop. With game.event_loop enabled the loop sleeps in
+    # pygame.event.wait while nothing is animating and only redraws when
+    # the frame would change; otherwise it renders every frame at 60 FPS.
+    event_loop = config['game'].get('event_loop', False)
     clock = pygame.time.Clock()
     running = True
+    last_frame = None
+    animating = True
     
     while running:
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            input_handler.handle_event(event)
+        with profiler.span('frame'):
+            # Handle events
+            with profiler.span('events'):
+                if event_loop and not animating:
+                    # Block until input arrives (or the timeout passes)
+                    event = pygame.event.wait(IDLE_WAIT_MS)
+                    events = [event] + pygame.event.get() if event.type != pygame.NOEVENT else []
+                else:
+                    events = pygame.event.get()
+                for event in events:
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type in EXPOSE_EVENTS:
+                        renderer.invalidate()
+                    input_handler.handle_event(event)
 
-        if input_handler.quit_requested:
-          running = False
-        
-        # Update game state
-        game_state.update()
-        
-        # Render the game
-        renderer.render()
-        
-        # Cap the frame rate
-        clock.tick(60)
+            if input_handler.quit_requested:
+              running = False
+            
+            # Update game state
+            with profiler.span('update'):
+                game_state.update()
+            animating = is_animating(game_state)
+            
+            # Render the game
+            frame = frame_key(game_state, input_handler)
+            if not event_loop or animating or frame != last_frame or renderer.needs_full_redraw():
+                with profiler.span('render'):
+                    renderer.render()
+                last_frame = frame
+            
+            # Cap the frame rate
+            if not event_loop or animating:
+                with profiler.span('tick'):
+                    clock.tick(60)
         
+    if ai_worker is not None:
+        ai_worker.close()
+    if trace_file:
+        count = profiler.export_chrome_trace(trace_file)
+        print(f"Wrote {count} trace events to {trace_file}")
+    if recorder is not None:
+        recorder.save(replay_file)
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,340 @@
+# mcts.py
+"""Monte Carlo tree search opponent.
+
+The search runs against SearchState, a compact picklable copy of the board
+(terrain costs plus one tuple per unit), so worker processes can be handed
+a snapshot cheaply. Each worker grows its own UCT tree for the time budget
+(root parallelisation) and the root statistics are merged to pick the move.
+"""
+import heapq
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from actions import AttackAction, plan_move
+from pathfinding import DIRECTIONS
+
+# Unit tuple layout inside SearchState.units
+X, Y, HP, STRENGTH, RANGE, MAX_MOVE, MOVE_POINTS, CAN_ATTACK, IS_PLAYER = range(9)
+
+
+class SearchState:
+    """Picklable board snapshot used by the search.
+
+    pending holds the indices of the units of the side to move that have
+    not acted yet this turn; an action always belongs to pending[0].
+    """
+
+    def __init__(self, width, height, cell_costs, units, side_is_player, pending):
+        self.width = width
+        self.height = height
+        self.cell_costs = cell_costs
+        self.units = units
+        self.side_is_player = side_is_player
+        self.pending = pending
+
+    @classmethod
+    def from_game_state(cls, game_state, acting_units):
+        """Snapshot game_state; returns (state, unit_refs) where unit_refs[i] is the Unit behind units[i]."""
+        grid = game_state.grid
+        if grid.is_chunked:
+            # The search state copies every cell's cost, which would load the whole terrain file
+            raise ValueError("MCTS doesn't support chunked terrain; use TacticalAI on terrain_file levels")
+        unit_refs = [u for u in game_state.units if u.is_alive()]
+        units = [(u.x, u.y, u.current_hp, u.strength, u.range, u.max_move_points,
+                  u.current_move_points if u.can_move() else 0, u.can_attack(), u.is_player)
+                 for u in unit_refs]
+
+        # Units act in the order given, not board order
+        index_of = {id(u): i for i, u in enumerate(unit_refs)}
+        pending = tuple(index_of[id(u)] for u in acting_units if id(u) in index_of)
+        side_is_player = unit_refs[pending[0]].is_player if pending else False
+
+        state = cls(grid.width, grid.height, tuple(grid.cell_costs), units, side_is_player, pending)
+        return state, unit_refs
+
+    def is_terminal(self):
+        players = enemies = False
+        for unit in self.units:
+            if unit[HP] > 0:
+                if unit[IS_PLAYER]:
+                    players = True
+                else:
+                    enemies = True
+        return not (players and enemies)
+
+    def reachable(self, index):
+        """Return {(x, y): cost} for every cell the unit can end its move on, including its own."""
+        unit = self.units[index]
+        width, height, cell_costs = self.width, self.height, self.cell_costs
+        occupied = set(u[Y] * width + u[X] for u in self.units if u[HP] > 0)
+
+        start = unit[Y] * width + unit[X]
+        max_cost = unit[MOVE_POINTS]
+        costs = {start: 0}
+        queue = [(0, start)]
+        while queue:
+            cost, i = heapq.heappop(queue)
+            if cost > costs[i]:
+                continue
+            x, y = i % width, i // width
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                ni = ny * width + nx
+                if ni in occupied:
+                    continue
+                new_cost = cost + cell_costs[ni]
+                if new_cost <= max_cost and new_cost < costs.get(ni, float('inf')):
+                    costs[ni] = new_cost
+                    heapq.heappush(queue, (new_cost, ni))
+
+        return {(i % width, i // width): cost for i, cost in costs.items()}
+
+    def legal_actions(self):
+        """Return the (dest_x, dest_y, target_index) actions for pending[0].
+
+        target_index is -1 for a plain move. Destinations with an enemy in
+        range only offer attacks, since declining a free attack never helps.
+        """
+        if not self.pending:
+            return []
+
+        index = self.pending[0]
+        unit = self.units[index]
+        targets = []
+        if unit[CAN_ATTACK]:
+            targets = [i for i, u in enumerate(self.units)
+                       if u[HP] > 0 and u[IS_PLAYER] != unit[IS_PLAYER]]
+
+        actions = []
+        for (x, y) in self.reachable(index):
+            attacks = [(x, y, t) for t in targets
+                       if abs(self.units[t][X] - x) + abs(self.units[t][Y] - y) <= unit[RANGE]]
+            if attacks:
+                actions.extend(attacks)
+            else:
+                actions.append((x, y, -1))
+        return actions
+
+    def apply(self, action):
+        """Return the state after pending[0] performs action."""
+        x, y, target = action
+        units = list(self.units)
+        index = self.pending[0]
+
+        unit = units[index]
+        units[index] = (x, y, unit[HP], unit[STRENGTH], unit[RANGE], unit[MAX_MOVE], 0, False, unit[IS_PLAYER])
+        if target >= 0:
+            victim = units[target]
+            units[target] = victim[:HP] + (max(0, victim[HP] - unit[STRENGTH]),) + victim[HP + 1:]
+
+        state = SearchState(self.width, self.height, self.cell_costs, units, self.side_is_player,
+                            self.pending[1:])
+        if not state.pending:
+            state._start_turn(not self.side_is_player)
+        return state
+
+    def _start_turn(self, side_is_player):
+        """Hand the move to the other side and refresh its units."""
+        self.side_is_player = side_is_player
+        pending = []
+        for i, unit in enumerate(self.units):
+            if unit[HP] > 0 and unit[IS_PLAYER] == side_is_player:
+                self.units[i] = unit[:MOVE_POINTS] + (unit[MAX_MOVE], True, unit[IS_PLAYER])
+                pending.append(i)
+        self.pending = tuple(pending)
+
+    def evaluate(self, for_player):
+        """Score in [0, 1] for the given side: remaining own HP share versus the opponent's."""
+        own = opponent = 0
+        for unit in self.units:
+            if unit[IS_PLAYER] == for_player:
+                own += unit[HP]
+            else:
+                opponent += unit[HP]
+        if own + opponent == 0:
+            return 0.5
+        return own / (own + opponent)
+
+
+def _rollout_action(state, rng):
+    """Cheap rollout policy: take the best attack if any, else move toward the nearest opponent."""
+    actions = state.legal_actions()
+    if rng.random() < 0.2:
+        return rng.choice(actions)
+
+    unit = state.units[state.pending[0]]
+    attacks = [a for a in actions if a[2] >= 0]
+    if attacks:
+        # Prefer kills, then the weakest target
+        return min(attacks, key=lambda a: state.units[a[2]][HP] - unit[STRENGTH])
+
+    opponents = [u for u in state.units if u[HP] > 0 and u[IS_PLAYER] != unit[IS_PLAYER]]
+    return min(actions, key=lambda a: min(abs(o[X] - a[0]) + abs(o[Y] - a[1]) for o in opponents))
+
+
+class _Node:
+    __slots__ = ('children', 'untried', 'visits', 'value')
+
+    def __init__(self, actions):
+        self.children = {}
+        self.untried = actions
+        self.visits = 0
+        self.value = 0.0
+
+
+def _search(state, seconds, seed, exploration, rollout_turns, max_iterations=None):
+    """Grow a UCT tree from state for the time budget.
+
+    The tree only covers the decisions of the side to move this turn; play
+    beyond that is a rollout. At least one iteration always runs, so a unit
+    left with no budget still gets a root action. Returns
+    ({action: (visits, value)}, iterations).
+    """
+    rng = random.Random(seed)
+    for_player = state.side_is_player
+    root = _Node(state.legal_actions())
+    rng.shuffle(root.untried)
+    deadline = time.perf_counter() + seconds
+    iterations = 0
+
+    while iterations == 0 or (time.perf_counter() < deadline
+                              and (max_iterations is None or iterations < max_iterations)):
+        node = root
+        current = state
+        path = [node]
+
+        # Selection: descend while the node is fully expanded and still this side's turn
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            action, node = max(node.children.items(),
+                               key=lambda item: item[1].value / item[1].visits
+                               + exploration * math.sqrt(log_visits / item[1].visits))
+            current = current.apply(action)
+            path.append(node)
+
+        # Expansion
+        if node.untried:
+            action = node.untried.pop()
+            current = current.apply(action)
+            same_turn = current.side_is_player == for_player and not current.is_terminal()
+            child = _Node(current.legal_actions() if same_turn else [])
+            rng.shuffle(child.untried)
+            node.children[action] = child
+            path.append(child)
+
+        # Rollout: finish this turn, then play rollout_turns more full turns
+        turns_left = rollout_turns
+        side = current.side_is_player
+        while not current.is_terminal() and current.pending:
+            current = current.apply(_rollout_action(current, rng))
+            if current.side_is_player != side:
+                side = current.side_is_player
+                turns_left -= 1
+                if turns_left < 0:
+                    break
+
+        # Backpropagation
+        reward = current.evaluate(for_player)
+        for visited in path:
+            visited.visits += 1
+            visited.value += reward
+        iterations += 1
+
+    return {action: (child.visits, child.value) for action, child in root.children.items()}, iterations
+
+
+class MCTSAI:
+    """UCT opponent that searches move+attack actions one unit at a time.
+
+    time_budget is split across the units still to act each turn. With
+    workers > 1 every unit's search runs on that many processes in parallel
+    and their root statistics are summed, so more cores mean more rollouts.
+    """
+
+    def __init__(self, rng=None, time_budget=1.0, workers=None, exploration=1.4, rollout_turns=2,
+                 max_iterations=None):
+        # Without an explicit RNG worker seeds come from the game state's seeded RNG
+        self.rng = rng
+        self.time_budget = time_budget
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.exploration = exploration
+        self.rollout_turns = rollout_turns
+        self.max_iterations = max_iterations
+        self._executor = None
+        # Filled in after every turn: iterations, seconds, iterations_per_second
+        self.last_stats = {}
+
+    def close(self):
+        """Shut down the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def take_turn(self, game_state, units, opponents):
+        grid = game_state.grid
+        start = time.perf_counter()
+        total_iterations = 0
+
+        rng = self.rng if self.rng is not None else game_state.rng
+        acting = [u for u in units if u.is_alive()]
+        for n, unit in enumerate(acting):
+            if not unit.is_alive() or game_state.is_game_over():
+                continue
+
+            # Split what is left of the budget evenly over the remaining units
+            remaining = self.time_budget - (time.perf_counter() - start)
+            seconds = max(0.0, remaining) / (len(acting) - n)
+
+            state, unit_refs = SearchState.from_game_state(game_state, acting[n:])
+            action, iterations = self._choose(state, seconds, rng)
+            total_iterations += iterations
+            if action is None:
+                continue
+
+            x, y, target = action
+            if (x, y) != (unit.x, unit.y):
+                move = plan_move(grid, unit, x, y)
+                if move is not None:
+                    game_state.apply(move)
+            if target >= 0:
+                game_state.apply(AttackAction(unit, unit_refs[target]))
+
+        elapsed = time.perf_counter() - start
+        self.last_stats = {
+            'iterations': total_iterations,
+            'seconds': elapsed,
+            'iterations_per_second': total_iterations / elapsed if elapsed > 0 else 0.0
+        }
+        game_state._log(f"MCTS: {total_iterations} iterations in {elapsed:.2f}s "
+                        f"({self.last_stats['iterations_per_second']:.0f}/s)")
+
+    def _choose(self, state, seconds, rng):
+        """Return (most visited root action, iterations run)."""
+        actions = state.legal_actions()
+        if len(actions) <= 1:
+            return (actions[0] if actions else None), 0
+
+        seeds = [rng.randrange(2 ** 32) for _ in range(self.workers)]
+        options = (self.exploration, self.rollout_turns, self.max_iterations)
+        if self.workers > 1:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            futures = [self._executor.submit(_search, state, seconds, seed, *options) for seed in seeds]
+            results = [future.result() for future in futures]
+        else:
+            results = [_search(state, seconds, seeds[0], *options)]
+
+        # Merge root statistics from every worker
+        visits = {}
+        iterations = 0
+        for stats, count in results:
+            iterations += count
+            for action, (n, _value) in stats.items():
+                visits[action] = visits.get(action, 0) + n
+
+        return max(visits, key=visits.get), iterations
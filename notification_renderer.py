@@ -0,0 +1,65 @@
+# notification_renderer.py
+import pygame
+
+
+class NotificationRenderer:
+    """Draws combat notifications from a pool of pre-rendered, pre-faded surfaces.
+
+    Each (message, color) is rendered once and faded copies are built for a
+    fixed number of alpha steps, so drawing any number of notifications is a
+    single Surface.blits() call with no per-frame surface allocation.
+    """
+
+    def __init__(self, text_cache, font, alpha_steps=32, max_messages=256):
+        self.text_cache = text_cache
+        self.font = font
+        self.alpha_steps = alpha_steps
+        self.max_messages = max_messages
+        # (message, color) -> list of surfaces indexed by alpha step
+        self._pool = {}
+        # Reused blit sequence, refilled every frame
+        self._batch = []
+
+    def _faded_surfaces(self, message, color):
+        key = (message, color)
+        surfaces = self._pool.get(key)
+        if surfaces is None:
+            if len(self._pool) >= self.max_messages:
+                self._pool.clear()
+            
+            text_surface = self.text_cache.render(self.font, message, color)
+            surfaces = []
+            for step in range(self.alpha_steps + 1):
+                # Copy into a surface with alpha so each step can fade independently
+                faded = pygame.Surface(text_surface.get_size(), pygame.SRCALPHA)
+                faded.blit(text_surface, (0, 0))
+                faded.set_alpha(255 * step // self.alpha_steps)
+                surfaces.append(faded)
+            self._pool[key] = surfaces
+        return surfaces
+
+    def render(self, screen, notifications, offset=(0, 0)):
+        """Blit all notifications in one call and return the rects they cover.
+
+        Notification positions are in world pixels; offset is the camera's
+        top-left corner, and notifications outside the screen are skipped.
+        """
+        if not notifications:
+            return []
+        
+        batch = self._batch
+        batch.clear()
+        steps = self.alpha_steps
+        offset_x, offset_y = offset
+        screen_width, screen_height = screen.get_size()
+        for notification in notifications:
+            x = notification.x - offset_x
+            y = notification.y + notification.y_offset - offset_y
+            surfaces = self._faded_surfaces(notification.message, notification.color)
+            width, height = surfaces[0].get_size()
+            if x >= screen_width or y >= screen_height or x + width <= 0 or y + height <= 0:
+                continue
+            # Round up so a notification only disappears once it has expired
+            step = -(-notification.get_alpha() * steps // 255)
+            batch.append((surfaces[step], (x, y)))
+        return screen.blits(batch)
@@ -0,0 +1,343 @@
+# pathfinding.py
+import heapq
+from collections import OrderedDict
+from functools import lru_cache
+
+# Orthogonal neighbour offsets used by every search over the grid
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+
+@lru_cache(maxsize=None)
+def diamond_offsets(radius):
+    """Return the (dx, dy) offsets with |dx| + |dy| <= radius, built once per radius.
+
+    The centre (0, 0) is included for any positive radius, matching how
+    attack ranges have always been highlighted.
+    """
+    offsets = [(0, 0)] if radius > 0 else []
+    for r in range(1, radius + 1):
+        for dx in range(-r, r + 1):
+            dy = r - abs(dx)
+            offsets.append((dx, dy))
+            if dy:
+                offsets.append((dx, -dy))
+    return tuple(offsets)
+
+
+@lru_cache(maxsize=4096)
+def cells_in_range(x, y, radius, width, height):
+    """Return the frozenset of in-bounds cells within Manhattan distance radius of (x, y).
+
+    Results are cached per position and map size, so repeated range
+    highlighting and target checks are a lookup plus a set membership test.
+    """
+    offsets = diamond_offsets(radius)
+    if radius <= x < width - radius and radius <= y < height - radius:
+        # The whole diamond fits on the map: no clipping needed
+        return frozenset((x + dx, y + dy) for dx, dy in offsets)
+    return frozenset((x + dx, y + dy) for dx, dy in offsets
+                     if 0 <= x + dx < width and 0 <= y + dy < height)
+
+
+class Reachability:
+    """Cost and predecessor maps from a single bounded Dijkstra pass.
+
+    Both maps are keyed by flat cell index (see Grid.index). Move range,
+    move cost and the route to any reachable cell are all answered from
+    the same search.
+    """
+
+    def __init__(self, grid, origin, costs, prev, order):
+        self.width = grid.width
+        self.origin = origin
+        self.costs = costs
+        self.prev = prev
+        # Reachable cells (excluding the origin) in the order Dijkstra settled them
+        self._cells = [(i % self.width, i // self.width) for i in order]
+
+    def __contains__(self, position):
+        x, y = position
+        i = y * self.width + x
+        return i != self.origin and i in self.costs
+
+    def cells(self):
+        """Return the reachable (x, y) cells, not including the starting cell."""
+        return self._cells
+
+    def cost_to(self, x, y):
+        """Return the movement cost to (x, y), or infinity if it is out of reach."""
+        return self.costs.get(y * self.width + x, float('inf'))
+
+    def path_to(self, x, y):
+        """Return the list of (x, y) steps from the start (exclusive) to (x, y), or None."""
+        i = y * self.width + x
+        if i not in self.costs:
+            return None
+
+        path = []
+        while i != self.origin:
+            path.append((i % self.width, i // self.width))
+            i = self.prev[i]
+        path.reverse()
+        return path
+
+
+def compute_reachability(grid, start_x, start_y, max_cost):
+    """Run Dijkstra from (start_x, start_y) over empty cells, stopping at max_cost."""
+    width, height = grid.width, grid.height
+    cell_costs = grid.cell_costs
+    occupants = grid.occupants
+
+    start = start_y * width + start_x
+    costs = {start: 0}
+    prev = {start: None}
+    order = []
+    queue = [(0, start)]
+
+    while queue:
+        cost, i = heapq.heappop(queue)
+
+        # Stale queue entry: a cheaper path was already settled
+        if cost > costs[i]:
+            continue
+        if i != start:
+            order.append(i)
+
+        x, y = i % width, i // width
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+
+            # Skip if out of bounds
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+
+            # Skip if cell has a unit
+            ni = ny * width + nx
+            if occupants[ni] is not None:
+                continue
+
+            new_cost = cost + cell_costs[ni]
+            if new_cost <= max_cost and new_cost < costs.get(ni, float('inf')):
+                costs[ni] = new_cost
+                prev[ni] = i
+                heapq.heappush(queue, (new_cost, ni))
+
+    return Reachability(grid, start, costs, prev, order)
+
+
+def movement_cost(grid, start_x, start_y, target_x, target_y):
+    """Return the unbounded cheapest movement cost between two cells.
+
+    The target may be occupied (e.g. by an enemy); every other occupied
+    cell blocks. Returns infinity when no path exists.
+    """
+    width, height = grid.width, grid.height
+    cell_costs = grid.cell_costs
+    occupants = grid.occupants
+
+    start = start_y * width + start_x
+    target = target_y * width + target_x
+    queue = [(0, start)]
+    distances = {start: 0}
+
+    while queue:
+        cost, i = heapq.heappop(queue)
+
+        # If we reached the target, return the cost
+        if i == target:
+            return cost
+
+        # If we've found a better path to this cell already, skip
+        if cost > distances.get(i, float('inf')):
+            continue
+
+        x, y = i % width, i // width
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+
+            # Skip if out of bounds
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+
+            # Skip if cell has a unit (unless it's the target)
+            ni = ny * width + nx
+            if occupants[ni] is not None and ni != target:
+                continue
+
+            new_cost = cost + cell_costs[ni]
+            if new_cost < distances.get(ni, float('inf')):
+                distances[ni] = new_cost
+                heapq.heappush(queue, (new_cost, ni))
+
+    # If we couldn't find a path, return infinity
+    return float('inf')
+
+
+def find_path(grid, start_x, start_y, target_x, target_y):
+    """A* search between two cells; returns (cost, path) or (infinity, None).
+
+    path lists the (x, y) steps from the start (exclusive) to the target.
+    As in movement_cost the target may be occupied and every other
+    occupied cell blocks. The heuristic is the Manhattan distance times the
+    cheapest terrain cost, which never overestimates, so the result is
+    optimal while the search heads for the target instead of flooding the
+    map.
+    """
+    width, height = grid.width, grid.height
+    cell_costs = grid.cell_costs
+    occupants = grid.occupants
+    min_cost = grid.min_terrain_cost
+
+    start = start_y * width + start_x
+    target = target_y * width + target_x
+    if start == target:
+        return 0, []
+
+    costs = {start: 0}
+    prev = {start: None}
+    h = (abs(target_x - start_x) + abs(target_y - start_y)) * min_cost
+    # Ties on f go to the entry closer to the target
+    queue = [(h, h, start)]
+
+    while queue:
+        _f, h, i = heapq.heappop(queue)
+        cost = costs[i]
+        if i == target:
+            path = []
+            while i != start:
+                path.append((i % width, i // width))
+                i = prev[i]
+            path.reverse()
+            return cost, path
+
+        # Stale entry: i was reached more cheaply after this was queued
+        if _f > cost + h:
+            continue
+
+        x, y = i % width, i // width
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+
+            ni = ny * width + nx
+            if occupants[ni] is not None and ni != target:
+                continue
+
+            new_cost = cost + cell_costs[ni]
+            if new_cost < costs.get(ni, float('inf')):
+                costs[ni] = new_cost
+                prev[ni] = i
+                nh = (abs(target_x - nx) + abs(target_y - ny)) * min_cost
+                heapq.heappush(queue, (new_cost + nh, nh, ni))
+
+    return float('inf'), None
+
+
+class PathCache:
+    """LRU cache of find_path results for one grid.
+
+    Entries are only valid for the occupancy they were computed against,
+    so the whole cache is dropped as soon as grid.version changes.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._paths = OrderedDict()  # (start, goal) -> (cost, path)
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self._paths.clear()
+
+    def find(self, grid, start_x, start_y, target_x, target_y):
+        """Cached find_path; treat the returned path as read-only."""
+        if grid.version != self._version:
+            self._paths.clear()
+            self._version = grid.version
+
+        key = (start_x, start_y, target_x, target_y)
+        result = self._paths.get(key)
+        if result is not None:
+            self._paths.move_to_end(key)
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = self._paths[key] = find_path(grid, start_x, start_y, target_x, target_y)
+        if len(self._paths) > self.maxsize:
+            self._paths.popitem(last=False)
+        return result
+
+
+class DistanceMap:
+    """Result of multi_source_distances, indexed by flat cell index like Grid.index.
+
+    Only the cells the search settled are stored. Without a horizon every
+    other cell is unreachable (infinity). With one, cells past it weren't
+    searched and get the Manhattan distance to the nearest source times the
+    cheapest terrain cost, but never less than the horizon: a lower bound on
+    their true cost that still ranks them behind every searched cell.
+    """
+    __slots__ = ('width', 'costs', 'sources', 'max_cost', 'min_step')
+
+    def __init__(self, grid, costs, sources, max_cost):
+        self.width = grid.width
+        self.costs = costs
+        self.sources = sources
+        self.max_cost = max_cost
+        self.min_step = grid.min_terrain_cost
+
+    def __getitem__(self, i):
+        cost = self.costs.get(i)
+        if cost is not None:
+            return cost
+        if self.max_cost is None or not self.sources:
+            return float('inf')
+        x, y = i % self.width, i // self.width
+        nearest = min(abs(x - sx) + abs(y - sy) for sx, sy in self.sources)
+        return max(self.max_cost, nearest * self.min_step)
+
+
+def multi_source_distances(grid, sources, max_cost=None):
+    """Return the cost of walking from every cell to the nearest source cell.
+
+    One Dijkstra pass seeded from all sources at once, over terrain costs
+    only (units are ignored), returned as a sparse DistanceMap. With
+    max_cost the search stops there, so on very large (chunked) maps it only
+    touches the area around the sources.
+    """
+    width, height = grid.width, grid.height
+    cell_costs = grid.cell_costs
+    sources = list(sources)
+
+    distances = {}
+    queue = []
+    for x, y in sources:
+        i = y * width + x
+        distances[i] = 0
+        queue.append((0, i))
+    heapq.heapify(queue)
+
+    while queue:
+        cost, i = heapq.heappop(queue)
+        if cost > distances[i]:
+            continue
+
+        # Walking from a neighbour into this cell costs this cell's terrain
+        new_cost = cost + cell_costs[i]
+        if max_cost is not None and new_cost > max_cost:
+            continue
+        x, y = i % width, i // width
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+
+            ni = ny * width + nx
+            if new_cost < distances.get(ni, float('inf')):
+                distances[ni] = new_cost
+                heapq.heappush(queue, (new_cost, ni))
+
+    return DistanceMap(grid, distances, sources, max_cost)
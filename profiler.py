@@ -0,0 +1,159 @@
+# profiler.py
+"""Lightweight frame profiler: named timing spans, rolling percentiles and trace export.
+
+Use the shared `profiler` instance:
+
+    with profiler.span('update'):
+        game_state.update()
+
+    @profiler.profiled('render.units')
+    def _render_units(self): ...
+
+While disabled a span is a single attribute check, so the instrumentation
+can stay in the main loop permanently. When enabled, the last `window`
+durations of every span are kept for p50/p95/p99, and with tracing on each
+span is also stored as an event for export to Chrome trace JSON (open it
+in chrome://tracing or https://ui.perfetto.dev).
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+perf_counter = time.perf_counter
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.record(self.name, self.start, perf_counter())
+        return False
+
+
+class Profiler:
+    def __init__(self, window=240, max_trace_events=200000):
+        self.enabled = False
+        self.overlay_visible = False
+        self.tracing = False
+        self.window = window  # Samples kept per span for the percentiles
+        self.samples = {}  # span name -> deque of durations in seconds
+        self.trace_events = deque(maxlen=max_trace_events)  # (name, start, duration, thread id)
+        self._origin = perf_counter()
+        # Spans are recorded from the AI worker thread too; held only while copying
+        self._lock = threading.Lock()
+
+    def configure(self, enabled=False, overlay=False, tracing=False):
+        self.enabled = enabled or overlay or tracing
+        self.overlay_visible = overlay
+        self.tracing = tracing
+
+    def toggle_overlay(self):
+        """Show or hide the overlay; showing it turns profiling on."""
+        self.overlay_visible = not self.overlay_visible
+        if self.overlay_visible:
+            self.enabled = True
+        return self.overlay_visible
+
+    def span(self, name):
+        """Context manager timing the enclosed block under name."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def profiled(self, name):
+        """Decorator timing every call of the function under name."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, start, perf_counter())
+            return wrapper
+        return decorator
+
+    def record(self, name, start, end):
+        """Add one span measurement (perf_counter timestamps)."""
+        with self._lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+            samples.append(end - start)
+            if self.tracing:
+                self.trace_events.append((name, start, end - start, threading.get_ident()))
+
+    def percentiles(self, name, points=(50, 95, 99)):
+        """Return the given percentiles (in seconds) of the recent samples of name, or None."""
+        with self._lock:
+            samples = self.samples.get(name)
+            samples = list(samples) if samples else None
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        last = len(ordered) - 1
+        return tuple(ordered[min(last, int(round(p / 100 * last)))] for p in points)
+
+    def summary(self):
+        """Return [(name, p50, p95, p99)] for every span, slowest p95 first."""
+        rows = []
+        with self._lock:
+            names = list(self.samples)
+        for name in names:
+            points = self.percentiles(name)
+            if points is not None:
+                rows.append((name,) + points)
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+            self.trace_events.clear()
+
+    def export_chrome_trace(self, path):
+        """Write the recorded trace events as Chrome trace JSON; returns the number of events."""
+        pid = os.getpid()
+        with self._lock:
+            trace_events = list(self.trace_events)
+        events = [{
+            'name': name,
+            'ph': 'X',
+            'ts': (start - self._origin) * 1e6,
+            'dur': duration * 1e6,
+            'pid': pid,
+            'tid': tid
+        } for name, start, duration, tid in trace_events]
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+        return len(events)
+
+
+# Shared instance used by the main loop and the renderer
+profiler = Profiler()
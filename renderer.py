@@ -1,5 +1,10 @@
 # renderer.py
+import time
 import pygame
+from camera import Camera
+from notification_renderer import NotificationRenderer
+from profiler import profiler
+from text_cache import TextCache
 
 class Renderer:
     def __init__(self, screen, game_state, config):
@@ -7,6 +12,9 @@ class Renderer:
         self.game_state = game_state
         self.config = config
         self.font = pygame.font.SysFont(None, 24)
+        # Most strings repeat frame to frame, so rendered text is cached
+        self.text_cache = TextCache()
+        self.notification_renderer = NotificationRenderer(self.text_cache, self.font)
         
         self.mov_key = self.config["controls"]["move_action"]
         self.att_key = self.config["controls"]["attack_action"]
@@ -23,12 +31,82 @@ class Renderer:
             'move_range': tuple(self.config['highlights']['move_range']),
             'attack_range': tuple(self.config['highlights']['attack_range'])
         }
+        
+        # The camera scrolls over maps larger than the window; only visible cells are drawn
+        grid = self.game_state.grid
+        self.camera = Camera(*self.screen.get_size(), grid.width, grid.height, grid.cell_size)
+        self.camera.follow(self.game_state.cursor_x, self.game_state.cursor_y)
+        
+        # One pre-drawn tile (fill plus grid line) per terrain type
+        self.terrain_colors = [tuple(self.config['terrain_types'][name]['color'])
+                               for name in grid.terrain_names]
+        self.terrain_tiles = []
+        for color in self.terrain_colors:
+            tile = pygame.Surface((grid.cell_size, grid.cell_size)).convert()
+            tile.fill(color)
+            pygame.draw.rect(tile, self.colors['grid_line'], tile.get_rect(), 1)
+            self.terrain_tiles.append(tile)
+        
+        # Translucent cell overlays for move/attack range, keyed by (cell size, color)
+        self._highlights = {}
+        
+        # Terrain only changes when the camera moves, so the visible part is
+        # drawn once into the static layer
+        self.static_layer = pygame.Surface(self.screen.get_size()).convert()
+        self._build_static_layer()
+        
+        # Dirty-rect bookkeeping: regions drawn this frame and the previous one
+        self._dirty_rects = []
+        self._previous_dirty_rects = []
+        self._full_redraw = True
+        
+        # Profiler overlay text, refreshed a few times a second so it stays readable
+        self._profiler_lines = []
+        self._profiler_refreshed = 0.0
+    
+    @profiler.profiled('render.static_layer')
+    def _build_static_layer(self):
+        """Pre-render background and the visible terrain into the off-screen layer."""
+        self.static_layer.fill(self.colors['background'])
+        self._render_grid(self.static_layer)
+        self._full_redraw = True
+    
+    def invalidate(self):
+        """Redraw the whole screen next frame (e.g. after the window was uncovered)."""
+        self._full_redraw = True
+    
+    def needs_full_redraw(self):
+        return self._full_redraw
+    
+    def _render_text(self, text, color):
+        return self.text_cache.render(self.font, text, color)
+    
+    def _highlight(self, color):
+        """Return the shared translucent cell-sized surface for a highlight color."""
+        cell_size = self.game_state.grid.cell_size
+        key = (cell_size, color)
+        surface = self._highlights.get(key)
+        if surface is None:
+            surface = self._highlights[key] = pygame.Surface((cell_size, cell_size), pygame.SRCALPHA)
+            surface.fill(color)
+        return surface
+    
+    def _mark(self, rect):
+        """Record a region drawn this frame."""
+        self._dirty_rects.append(rect)
     
     def render(self):
-        self.screen.fill(self.colors['background'])
+        # Scrolling invalidates the whole terrain layer
+        if self.camera.follow(self.game_state.cursor_x, self.game_state.cursor_y):
+            self._build_static_layer()
         
-        # Render grid
-        self._render_grid()
+        # Restore the static layer only where something was drawn last frame
+        if self._full_redraw:
+            self.screen.blit(self.static_layer, (0, 0))
+        else:
+            for rect in self._previous_dirty_rects:
+                self.screen.blit(self.static_layer, rect, rect)
+        self._dirty_rects = []
         
         # Render move and attack ranges for selected unit
         if self.game_state.selected_unit:
@@ -55,68 +133,74 @@ class Renderer:
 
         # Render combat notifications
         self._render_combat_notifications()
+        
+        # Render the profiler overlay on top of everything
+        if profiler.overlay_visible:
+            self._render_profiler_overlay()
 
-        # Update display
-        pygame.display.flip()
+        # Update display: push only the regions that changed since the last frame
+        if self._full_redraw:
+            pygame.display.flip()
+            self._full_redraw = False
+        else:
+            with profiler.span('render.display_update'):
+                pygame.display.update(self._previous_dirty_rects + self._dirty_rects)
+        self._previous_dirty_rects = self._dirty_rects
 
+    @profiler.profiled('render.level_info')
     def _render_level_info(self):
         level_name = self.game_state.grid.get_level_name()
         level_text = f"Level: {level_name}"
-        level_surface = self.font.render(level_text, True, self.colors['text'])
-        self.screen.blit(level_surface, (10, 10))
+        level_surface = self._render_text(level_text, self.colors['text'])
+        self._mark(self.screen.blit(level_surface, (10, 10)))
 
-    def _render_grid(self):
-        cell_size = self.game_state.grid.cell_size
+    def _render_grid(self, surface):
+        grid = self.game_state.grid
+        cell_size = grid.cell_size
+        tiles = self.terrain_tiles
+        x0, y0, x1, y1 = self.camera.visible_bounds()
         
-        # Draw terrain
-        for y in range(self.game_state.grid.height):
-            for x in range(self.game_state.grid.width):
-                cell = self.game_state.grid.get_cell(x, y)
-                terrain = cell['terrain']
-                color = tuple(self.config['terrain_types'][terrain]['color'])
-                
-                rect = pygame.Rect(
-                    x * cell_size, 
-                    y * cell_size, 
-                    cell_size, 
-                    cell_size
-                )
-                pygame.draw.rect(self.screen, color, rect)
-                pygame.draw.rect(self.screen, self.colors['grid_line'], rect, 1)
+        # Draw the visible terrain in one batched blit
+        batch = []
+        for y in range(y0, y1):
+            row = y * grid.width
+            screen_y = (y - y0) * cell_size
+            for x in range(x0, x1):
+                batch.append((tiles[grid.terrain[row + x]], ((x - x0) * cell_size, screen_y)))
+        surface.blits(batch, doreturn=False)
     
+    @profiler.profiled('render.move_range')
     def _render_move_range(self):
-        cell_size = self.game_state.grid.cell_size
         move_cells = self.game_state.get_move_range_cells()
+        move_highlight = self._highlight(self.colors['move_range'])
         
-        # Create a surface with alpha for move range
-        move_highlight = pygame.Surface((cell_size, cell_size), pygame.SRCALPHA)
-        move_highlight.fill(self.colors['move_range'])
-        
-        for x, y in move_cells:
-            self.screen.blit(move_highlight, (x * cell_size, y * cell_size))
+        camera = self.camera
+        self._dirty_rects.extend(self.screen.blits(
+            [(move_highlight, camera.to_screen(x, y)) for x, y in move_cells if camera.is_visible(x, y)]))
     
+    @profiler.profiled('render.attack_range')
     def _render_attack_range(self):
         """Render the attack range of the selected unit."""
-        cell_size = self.game_state.grid.cell_size
         attack_cells = self.game_state.get_attack_range_cells()
+        attack_highlight = self._highlight(self.colors['attack_range'])
         
-        # Create a surface with alpha for attack range
-        attack_highlight = pygame.Surface((cell_size, cell_size), pygame.SRCALPHA)
-        attack_highlight.fill(self.colors['attack_range'])
-        
-        for x, y in attack_cells:
-            self.screen.blit(attack_highlight, (x * cell_size, y * cell_size))
+        camera = self.camera
+        self._dirty_rects.extend(self.screen.blits(
+            [(attack_highlight, camera.to_screen(x, y)) for x, y in attack_cells if camera.is_visible(x, y)]))
 
+    @profiler.profiled('render.attack_targets')
     def _render_attack_targets(self):
         """Highlight enemies that can be attacked by the selected unit."""
         cell_size = self.game_state.grid.cell_size
         attackable_enemies = self.game_state.get_attackable_enemies()
         
         for enemy in attackable_enemies:
-            x, y = enemy.x, enemy.y
-            rect = pygame.Rect(x * cell_size, y * cell_size, cell_size, cell_size)
-            pygame.draw.rect(self.screen, (255, 0, 0), rect, 3)  # Red outline for attackable enemies
+            if not self.camera.is_visible(enemy.x, enemy.y):
+                continue
+            rect = pygame.Rect(*self.camera.to_screen(enemy.x, enemy.y), cell_size, cell_size)
+            self._mark(pygame.draw.rect(self.screen, (255, 0, 0), rect, 3))  # Red outline for attackable enemies
 
+    @profiler.profiled('render.combat_preview')
     def _render_combat_preview(self):
         """Show a preview of combat results when hovering over an attackable enemy."""
         if not self.game_state.selected_unit or not self.game_state.selected_unit.can_attack():
@@ -141,7 +225,7 @@ class Renderer:
                     190, 
                     100
                 )
-                pygame.draw.rect(self.screen, self.colors['info_panel'], panel)
+                self._mark(pygame.draw.rect(self.screen, self.colors['info_panel'], panel))
                 pygame.draw.rect(self.screen, (200, 0, 0), panel, 2)  # Red border
                 
                 # Display combat preview info
@@ -149,26 +233,29 @@ class Renderer:
                 expected_damage = attacker.strength
                 target_hp_after = max(0, target.current_hp - expected_damage)
                 
-                title = self.font.render("Combat Preview", True, self.colors['text'])
-                attack_text = self.font.render(f"{attacker.unit_type} → {target.unit_type}", True, self.colors['text'])
-                damage_text = self.font.render(f"Damage: {expected_damage}", True, self.colors['text'])
-                hp_text = self.font.render(f"Enemy HP: {target.current_hp} → {target_hp_after}", True, self.colors['text'])
+                title = self._render_text("Combat Preview", self.colors['text'])
+                attack_text = self._render_text(f"{attacker.unit_type} → {target.unit_type}", self.colors['text'])
+                damage_text = self._render_text(f"Damage: {expected_damage}", self.colors['text'])
+                hp_text = self._render_text(f"Enemy HP: {target.current_hp} → {target_hp_after}", self.colors['text'])
                 
                 self.screen.blit(title, (panel.x + 10, panel.y + 10))
                 self.screen.blit(attack_text, (panel.x + 10, panel.y + 35))
                 self.screen.blit(damage_text, (panel.x + 10, panel.y + 55))
                 self.screen.blit(hp_text, (panel.x + 10, panel.y + 75))
 
+    @profiler.profiled('render.units')
     def _render_units(self):
         cell_size = self.game_state.grid.cell_size
         
-        for unit in self.game_state.units:
+        # Only units inside the view are looked at
+        for unit in self.game_state.grid.get_units_in_rect(*self.camera.visible_bounds()):
             if not unit.is_alive():
                 continue
                 
             # Draw circle for unit
-            x_center = unit.x * cell_size + cell_size // 2
-            y_center = unit.y * cell_size + cell_size // 2
+            screen_x, screen_y = self.camera.to_screen(unit.x, unit.y)
+            x_center = screen_x + cell_size // 2
+            y_center = screen_y + cell_size // 2
             radius = cell_size // 3
             
             # Use unit's own color
@@ -176,27 +263,28 @@ class Renderer:
             
             # If unit is selected, highlight it
             if unit == self.game_state.selected_unit:
-                pygame.draw.circle(self.screen, (0, 255, 0), (x_center, y_center), radius + 3)
+                self._mark(pygame.draw.circle(self.screen, (0, 255, 0), (x_center, y_center), radius + 3))
             
-            pygame.draw.circle(self.screen, color, (x_center, y_center), radius)
+            self._mark(pygame.draw.circle(self.screen, color, (x_center, y_center), radius))
             
             # Draw HP
-            hp_text = self.font.render(str(unit.current_hp), True, self.colors['text'])
-            self.screen.blit(hp_text, (x_center - 5, y_center - 8))
+            hp_text = self._render_text(str(unit.current_hp), self.colors['text'])
+            self._mark(self.screen.blit(hp_text, (x_center - 5, y_center - 8)))
             
             # Draw movement points remaining (for player units)
             if unit.is_player:
-                move_text = self.font.render(str(unit.current_move_points), True, self.colors['text'])
-                self.screen.blit(move_text, (x_center - 5, y_center + 8))
+                move_text = self._render_text(str(unit.current_move_points), self.colors['text'])
+                self._mark(self.screen.blit(move_text, (x_center - 5, y_center + 8)))
     
+    @profiler.profiled('render.cursor')
     def _render_cursor(self):
         cell_size = self.game_state.grid.cell_size
-        x = self.game_state.cursor_x * cell_size
-        y = self.game_state.cursor_y * cell_size
+        x, y = self.camera.to_screen(self.game_state.cursor_x, self.game_state.cursor_y)
         
         rect = pygame.Rect(x, y, cell_size, cell_size)
-        pygame.draw.rect(self.screen, self.colors['cursor'], rect, 3)
+        self._mark(pygame.draw.rect(self.screen, self.colors['cursor'], rect, 3))
     
+    @profiler.profiled('render.info_panels')
     def _render_info_panels(self):
         screen_width = self.config['game']['window']['width']
         screen_height = self.config['game']['window']['height']
@@ -208,7 +296,7 @@ class Renderer:
             250, 
             100
         )
-        pygame.draw.rect(self.screen, self.colors['info_panel'], terrain_panel)
+        self._mark(pygame.draw.rect(self.screen, self.colors['info_panel'], terrain_panel))
         
         # Get and display cursor info
         cursor_info = self.game_state.get_cursor_info()
@@ -221,9 +309,9 @@ class Renderer:
             terrain_cost = f"Move Cost: {terrain['movement_cost']}"
             
             texts = [
-                self.font.render(terrain_text, True, self.colors['text']),
-                self.font.render(terrain_desc, True, self.colors['text']),
-                self.font.render(terrain_cost, True, self.colors['text'])
+                self._render_text(terrain_text, self.colors['text']),
+                self._render_text(terrain_desc, self.colors['text']),
+                self._render_text(terrain_cost, self.colors['text'])
             ]
             
             for i, text in enumerate(texts):
@@ -237,7 +325,7 @@ class Renderer:
                 250,
                 120
             )
-            pygame.draw.rect(self.screen, self.colors['info_panel'], unit_panel)
+            self._mark(pygame.draw.rect(self.screen, self.colors['info_panel'], unit_panel))
             
             # Render unit info
             unit = cursor_info['unit']
@@ -247,10 +335,10 @@ class Renderer:
             unit_move = f"Move: {unit['move']}"  # Now shows current/max move points
             
             texts = [
-                self.font.render(unit_text, True, self.colors['text']),
-                self.font.render(unit_hp, True, self.colors['text']),
-                self.font.render(unit_stats, True, self.colors['text']),
-                self.font.render(unit_move, True, self.colors['text'])
+                self._render_text(unit_text, self.colors['text']),
+                self._render_text(unit_hp, self.colors['text']),
+                self._render_text(unit_stats, self.colors['text']),
+                self._render_text(unit_move, self.colors['text'])
             ]
             
             for i, text in enumerate(texts):
@@ -264,28 +352,49 @@ class Renderer:
                     250,
                     50
                 )
-                pygame.draw.rect(self.screen, self.colors['info_panel'], order_panel)
+                self._mark(pygame.draw.rect(self.screen, self.colors['info_panel'], order_panel))
                 
                 # Render order options - updated to reflect direct action at cursor
                 orders_text = f"[{self.mov_key}] Move  [{self.att_key}] Attack"
                 orders2_text = f"[{self.pass_key}] Pass Turn  [{self.sel_key}] Deselect"
-                orders = self.font.render(orders_text, True, self.colors['text'])
-                orders2 = self.font.render(orders2_text, True, self.colors['text'])
-                self.screen.blit(orders, (10, screen_height - 170))
-                self.screen.blit(orders2, (10, screen_height - 150))
+                orders = self._render_text(orders_text, self.colors['text'])
+                orders2 = self._render_text(orders2_text, self.colors['text'])
+                self._mark(self.screen.blit(orders, (10, screen_height - 170)))
+                self._mark(self.screen.blit(orders2, (10, screen_height - 150)))
         
         # Show current turn info
         turn_text = f"Current Turn: {self.game_state.current_turn.capitalize()}"
-        turn_surface = self.font.render(turn_text, True, self.colors['text'])
-        self.screen.blit(turn_surface, (screen_width // 2 - 80, 10))
+        worker = self.game_state.ai_worker
+        if self.game_state.current_turn == "enemy" and worker is not None and worker.running:
+            turn_text += f" (thinking {worker.progress:.0%})"
+        turn_surface = self._render_text(turn_text, self.colors['text'])
+        self._mark(self.screen.blit(turn_surface, (screen_width // 2 - 80, 10)))
         
         # Show current action mode
         if self.game_state.current_turn == "player":
             mode_text = f"Mode: {self.game_state.input_handler.action_mode.capitalize()}"
-            mode_surface = self.font.render(mode_text, True, self.colors['text'])
-            self.screen.blit(mode_surface, (screen_width // 2 - 50, 40))
+            mode_surface = self._render_text(mode_text, self.colors['text'])
+            self._mark(self.screen.blit(mode_surface, (screen_width // 2 - 50, 40)))
 
+    @profiler.profiled('render.notifications')
     def _render_combat_notifications(self):
         """Render temporary combat notifications."""
-        for notification in self.game_state.combat_notifications:
-            notification.render(self.screen, self.font)
\ No newline at end of file
+        self._dirty_rects.extend(
+            self.notification_renderer.render(self.screen, self.game_state.combat_notifications,
+                                              self.camera.offset))
+
+    def _render_profiler_overlay(self):
+        """Draw the slowest profiler spans with their p50/p95/p99 in milliseconds."""
+        now = time.perf_counter()
+        if now - self._profiler_refreshed > 0.5:
+            self._profiler_refreshed = now
+            self._profiler_lines = ["span                 p50    p95    p99 ms"]
+            for name, p50, p95, p99 in profiler.summary()[:12]:
+                self._profiler_lines.append(f"{name[:18]:<18} {p50 * 1000:6.2f} {p95 * 1000:6.2f} {p99 * 1000:6.2f}")
+        
+        line_height = 20
+        panel = pygame.Rect(10, 70, 360, 10 + line_height * len(self._profiler_lines))
+        self._mark(pygame.draw.rect(self.screen, self.colors['info_panel'], panel))
+        for i, line in enumerate(self._profiler_lines):
+            text = self._render_text(line, self.colors['text'])
+            self.screen.blit(text, (panel.x + 5, panel.y + 5 + i * line_height))
@@ -0,0 +1,238 @@
+# replay.py
+"""Compact binary replay recording and headless playback.
+
+A replay is a small header (level, seed) followed by one record per action:
+a 1-byte opcode plus fixed-size little-endian fields. Units are referred to
+by their position in GameState.units. AI decisions are stored as the moves
+and attacks they produced, so playback never runs the AI and works at full
+CPU speed.
+
+    python replay.py match.tbsr --turn 12
+"""
+import argparse
+import struct
+
+from config_loader import load_config
+from game_state import GameState
+from grid import Grid
+
+MAGIC = b'TBSR'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<4sBHq')  # magic, format version, level index, seed
+
+# Opcodes and the struct of their payload
+OP_SELECT = 1      # unit
+OP_DESELECT = 2
+OP_MOVE = 3        # unit, x, y, movement cost
+OP_ATTACK = 4      # attacker, target
+OP_END_TURN = 5
+OP_UNDO = 6
+OP_REDO = 7
+
+# Unit IDs and coordinates are 32-bit so very large maps and armies fit; the
+# movement cost is a double so fractional terrain costs replay exactly
+PAYLOADS = {
+    OP_SELECT: struct.Struct('<I'),
+    OP_DESELECT: struct.Struct('<'),
+    OP_MOVE: struct.Struct('<IIId'),
+    OP_ATTACK: struct.Struct('<II'),
+    OP_END_TURN: struct.Struct('<'),
+    OP_UNDO: struct.Struct('<'),
+    OP_REDO: struct.Struct('<'),
+}
+
+# Version 1 replays used 16-bit fields and whole-number move costs; they still play back
+_PAYLOADS_BY_VERSION = {
+    1: {**PAYLOADS,
+        OP_SELECT: struct.Struct('<H'),
+        OP_MOVE: struct.Struct('<HHHH'),
+        OP_ATTACK: struct.Struct('<HH')},
+    FORMAT_VERSION: PAYLOADS,
+}
+
+
+class ReplayRecorder:
+    """Collects the actions of one match into a compact byte buffer."""
+
+    def __init__(self):
+        self.level_index = 0
+        self.seed = 0
+        self.data = bytearray()
+
+    def attach(self, game_state):
+        """Start recording game_state; call before any action is taken."""
+        self.level_index = game_state.level_index
+        self.seed = game_state.seed
+        self.data = bytearray()
+        game_state.recorder = self
+
+    def _write(self, opcode, *fields):
+        try:
+            payload = PAYLOADS[opcode].pack(*fields)
+        except struct.error as error:
+            raise ValueError(f"Can't record replay opcode {opcode} with fields {fields}: {error}") from None
+        self.data.append(opcode)
+        self.data += payload
+
+    def record_select(self, unit_id):
+        self._write(OP_SELECT, unit_id)
+
+    def record_deselect(self):
+        self._write(OP_DESELECT)
+
+    def record_move(self, unit_id, x, y, movement_cost):
+        self._write(OP_MOVE, unit_id, x, y, movement_cost)
+
+    def record_attack(self, attacker_id, target_id):
+        self._write(OP_ATTACK, attacker_id, target_id)
+
+    def record_end_turn(self):
+        self._write(OP_END_TURN)
+
+    def record_undo(self):
+        self._write(OP_UNDO)
+
+    def record_redo(self):
+        self._write(OP_REDO)
+
+    def to_bytes(self):
+        return HEADER.pack(MAGIC, FORMAT_VERSION, self.level_index, self.seed) + bytes(self.data)
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+
+def decode(data):
+    """Return (level_index, seed, actions) where actions is a list of (opcode, *fields) tuples."""
+    magic, version, level_index, seed = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a replay file")
+    payloads = _PAYLOADS_BY_VERSION.get(version)
+    if payloads is None:
+        raise ValueError(f"Unsupported replay format version {version}")
+
+    actions = []
+    offset = HEADER.size
+    while offset < len(data):
+        opcode = data[offset]
+        payload = payloads.get(opcode)
+        if payload is None:
+            raise ValueError(f"Unknown replay opcode {opcode} at byte {offset}")
+        actions.append((opcode,) + payload.unpack_from(data, offset + 1))
+        offset += 1 + payload.size
+    return level_index, seed, actions
+
+
+class ReplayPlayer:
+    """Plays a recorded match back headlessly, with checkpoints for seeking.
+
+    A snapshot is kept at the start of every checkpoint_interval-th player
+    turn reached, so seeking backwards (or forwards past a visited turn)
+    restores the nearest checkpoint and only replays the actions after it.
+    """
+
+    def __init__(self, config, data, checkpoint_interval=10):
+        self.level_index, self.seed, self.actions = decode(data)
+        self.checkpoint_interval = checkpoint_interval
+
+        grid = Grid(config, self.level_index)
+        # Undo history is only needed to play back recorded undos
+        undo = any(action[0] == OP_UNDO for action in self.actions)
+        self.game_state = GameState(grid, config, self.level_index, verbose=False, seed=self.seed, undo=undo)
+        self.position = 0  # Index of the next action to apply
+        # turn number -> (action position, snapshot) at the start of that player turn
+        self.checkpoints = {1: (0, self.game_state.snapshot())}
+
+    @classmethod
+    def load(cls, config, path, checkpoint_interval=10):
+        with open(path, 'rb') as file:
+            return cls(config, file.read(), checkpoint_interval)
+
+    def is_finished(self):
+        return self.position >= len(self.actions)
+
+    def step(self):
+        """Apply the next recorded action; returns False at the end of the replay."""
+        if self.is_finished():
+            return False
+
+        game_state = self.game_state
+        units = game_state.units
+        opcode, *fields = self.actions[self.position]
+        self.position += 1
+
+        if opcode == OP_SELECT:
+            game_state.selected_unit = units[fields[0]]
+        elif opcode == OP_DESELECT:
+            game_state.selected_unit = None
+        elif opcode == OP_MOVE:
+            unit_id, x, y, movement_cost = fields
+            if movement_cost == int(movement_cost):
+                # Keep whole-number move points ints, as they were when recorded
+                movement_cost = int(movement_cost)
+            game_state.move_unit(units[unit_id], x, y, movement_cost)
+        elif opcode == OP_ATTACK:
+            game_state.resolve_attack(units[fields[0]], units[fields[1]])
+        elif opcode == OP_END_TURN:
+            game_state._end_turn()
+            turn = game_state.turn_number
+            if (game_state.current_turn == "player" and turn % self.checkpoint_interval == 0
+                    and turn not in self.checkpoints):
+                self.checkpoints[turn] = (self.position, game_state.snapshot())
+        elif opcode == OP_UNDO:
+            game_state.undo()
+        elif opcode == OP_REDO:
+            game_state.redo()
+        return True
+
+    def seek(self, turn):
+        """Fast-forward (or rewind) to the start of the given player turn, or the end of the replay."""
+        # Rewind to the latest checkpoint at or before the target turn if we are past it
+        position, state = self.checkpoints[max(t for t in self.checkpoints if t <= turn)]
+        game_state = self.game_state
+        past = game_state.turn_number > turn or (game_state.turn_number == turn and not self._at_turn_start())
+        if past or self.position < position:
+            self.position = position
+            game_state.restore(state)
+            game_state._undo_stack.clear()
+            game_state._redo_stack.clear()
+
+        while not self.is_finished() and not (game_state.turn_number >= turn and self._at_turn_start()):
+            self.step()
+        return game_state
+
+    def _at_turn_start(self):
+        # The player's turn starts right after the enemy's END_TURN (or at the very beginning)
+        if self.game_state.current_turn != "player":
+            return False
+        return self.position == 0 or self.actions[self.position - 1][0] == OP_END_TURN
+
+    def play_to_end(self):
+        while self.step():
+            pass
+        return self.game_state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play back a recorded match headlessly.")
+    parser.add_argument('replay')
+    parser.add_argument('--config', default="config.yaml")
+    parser.add_argument('--turn', type=int, help="stop at the start of this turn (default: end of match)")
+    args = parser.parse_args()
+
+    player = ReplayPlayer.load(load_config(args.config), args.replay)
+    game_state = player.seek(args.turn) if args.turn else player.play_to_end()
+
+    print(f"Level {player.level_index}, seed {player.seed}: turn {game_state.turn_number} "
+          f"({game_state.current_turn}), action {player.position}/{len(player.actions)}")
+    for unit in game_state.units:
+        side = "Player" if unit.is_player else "Enemy"
+        print(f"  {side} {unit.unit_type} at ({unit.x}, {unit.y}) HP {unit.current_hp}/{unit.max_hp}")
+    winner = game_state.get_winner()
+    if winner:
+        print(f"Winner: {winner}")
+
+
+if __name__ == "__main__":
+    main()
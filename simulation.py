@@ -0,0 +1,127 @@
+# simulation.py
+"""Headless match runner for balance testing.
+
+Builds Grid + GameState straight from config.yaml (pygame is never imported)
+and plays whole matches between two AI controllers as fast as the CPU allows.
+
+    python simulation.py --games 1000 --workers 4
+"""
+import argparse
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from ai import AI_TYPES
+from config_loader import load_config
+from game_state import GameState
+from grid import Grid
+from unit_table import UnitTable
+
+MatchResult = namedtuple('MatchResult', ['level_index', 'seed', 'winner', 'turns'])
+
+
+def play_match(config, level_index=0, seed=None, player_ai='random', enemy_ai='tactical', max_turns=100,
+               recorder=None, unit_table=False):
+    """Play one match headlessly and return a MatchResult.
+
+    player_ai / enemy_ai are names from ai.AI_TYPES. Both controllers draw
+    from the game state's RNG, so a (level, seed) pair always replays
+    identically. A match still undecided after max_turns is reported with
+    winner None. Pass a replay.ReplayRecorder to record the match, and
+    unit_table=True to keep the units in a unit_table.UnitTable (needs NumPy).
+    """
+    player = AI_TYPES[player_ai]()
+    enemy = AI_TYPES[enemy_ai]()
+
+    grid = Grid(config, level_index)
+    table = UnitTable() if unit_table else None
+    game_state = GameState(grid, config, level_index, verbose=False, unit_table=table, seed=seed)
+    game_state.enemy_ai = enemy
+    if recorder is not None:
+        recorder.attach(game_state)
+
+    while not game_state.is_game_over() and game_state.turn_number <= max_turns:
+        player.take_turn(game_state, game_state.player_units, game_state.enemy_units)
+        game_state.end_player_turn()
+
+        # update() plays the enemy turn and hands control back to the player
+        game_state.update()
+
+    # Controllers that own worker processes release them here
+    for controller in (player, enemy):
+        if hasattr(controller, 'close'):
+            controller.close()
+
+    return MatchResult(level_index, seed, game_state.get_winner(), game_state.turn_number)
+
+
+def _play_chunk(args):
+    config, matches, player_ai, enemy_ai, max_turns, unit_table = args
+    return [play_match(config, level_index, seed, player_ai, enemy_ai, max_turns, unit_table=unit_table)
+            for level_index, seed in matches]
+
+
+def run_batch(config, games_per_level=100, levels=None, base_seed=0,
+              player_ai='random', enemy_ai='tactical', max_turns=100, workers=1, unit_table=False):
+    """Play games_per_level seeded matches on each level and return (results, elapsed_seconds)."""
+    if levels is None:
+        levels = range(len(config['levels']))
+    matches = [(level_index, base_seed + i) for level_index in levels for i in range(games_per_level)]
+
+    start = time.perf_counter()
+    if workers > 1:
+        # Hand each worker a contiguous slice so the config is pickled once per chunk
+        chunk_size = max(1, len(matches) // (workers * 4))
+        chunks = [(config, matches[i:i + chunk_size], player_ai, enemy_ai, max_turns, unit_table)
+                  for i in range(0, len(matches), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = [result for chunk in executor.map(_play_chunk, chunks) for result in chunk]
+    else:
+        results = _play_chunk((config, matches, player_ai, enemy_ai, max_turns, unit_table))
+    elapsed = time.perf_counter() - start
+
+    return results, elapsed
+
+
+def summarize(config, results, elapsed):
+    """Print games/second and per-level win rates."""
+    total = len(results)
+    rate = total / elapsed if elapsed > 0 else float('inf')
+    print(f"Played {total} games in {elapsed:.2f}s ({rate:.1f} games/s)")
+
+    by_level = {}
+    for result in results:
+        by_level.setdefault(result.level_index, []).append(result)
+
+    for level_index, level_results in sorted(by_level.items()):
+        name = config['levels'][level_index]['name']
+        count = len(level_results)
+        player_wins = sum(1 for r in level_results if r.winner == "player")
+        enemy_wins = sum(1 for r in level_results if r.winner == "enemy")
+        draws = count - player_wins - enemy_wins
+        avg_turns = sum(r.turns for r in level_results) / count
+        print(f"{name}: player {player_wins / count:.1%}  enemy {enemy_wins / count:.1%}  "
+              f"draw {draws / count:.1%}  avg turns {avg_turns:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless matches for balance testing.")
+    parser.add_argument('--config', default="config.yaml")
+    parser.add_argument('--games', type=int, default=100, help="games per level")
+    parser.add_argument('--level', type=int, action='append', help="level index (repeatable, default: all)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game")
+    parser.add_argument('--player-ai', default='random', choices=sorted(AI_TYPES))
+    parser.add_argument('--enemy-ai', default='tactical', choices=sorted(AI_TYPES))
+    parser.add_argument('--max-turns', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--unit-table', action='store_true', help="store units in a NumPy UnitTable")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    results, elapsed = run_batch(config, args.games, args.level, args.seed,
+                                 args.player_ai, args.enemy_ai, args.max_turns, args.workers, args.unit_table)
+    summarize(config, results, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# snapshot.py
+"""Cheap, hashable game-state snapshots.
+
+A snapshot only records what changes during play: one small tuple per unit
+(in GameState.units order) plus the turn, selection and cursor. Terrain and
+per-type unit stats are never copied. Unit tuples that did not change since
+the previous snapshot are reused, so a long undo history shares most of its
+structure.
+"""
+from collections import namedtuple
+
+GameSnapshot = namedtuple('GameSnapshot', ['units', 'current_turn', 'turn_number', 'selected_index', 'cursor'])
+
+
+def _unit_state(unit):
+    return (unit.x, unit.y, unit.current_hp, unit.current_move_points, unit.has_moved, unit.has_attacked)
+
+
+def capture_snapshot(game_state, previous=None):
+    """Return a GameSnapshot of game_state, sharing unchanged unit tuples with previous."""
+    units = game_state.units
+    previous_units = previous.units if previous is not None and len(previous.units) == len(units) else None
+
+    states = []
+    selected_index = -1
+    for i, unit in enumerate(units):
+        state = _unit_state(unit)
+        if previous_units is not None and previous_units[i] == state:
+            state = previous_units[i]
+        states.append(state)
+        if unit is game_state.selected_unit:
+            selected_index = i
+
+    return GameSnapshot(tuple(states), game_state.current_turn, game_state.turn_number,
+                        selected_index, (game_state.cursor_x, game_state.cursor_y))
+
+
+def restore_snapshot(game_state, snapshot):
+    """Put game_state back into the state recorded in snapshot.
+
+    Only units whose state differs from the snapshot are touched on the grid.
+    """
+    grid = game_state.grid
+    units = game_state.units
+
+    changed = []
+    for unit, state in zip(units, snapshot.units):
+        if _unit_state(unit) != state:
+            changed.append((unit, state))
+
+    # Lift every changed unit off the board first so swapped positions can't collide
+    for unit, _state in changed:
+        if grid.get_unit(unit.x, unit.y) is unit:
+            grid.remove_unit(unit.x, unit.y)
+
+    for unit, (x, y, hp, move_points, has_moved, has_attacked) in changed:
+        unit.current_hp = hp
+        unit.current_move_points = move_points
+        unit.has_moved = has_moved
+        unit.has_attacked = has_attacked
+        if hp > 0:
+            grid.place_unit(unit, x, y)
+        else:
+            unit.x, unit.y = x, y
+
+    game_state.current_turn = snapshot.current_turn
+    game_state.turn_number = snapshot.turn_number
+    game_state.selected_unit = units[snapshot.selected_index] if snapshot.selected_index >= 0 else None
+    game_state.cursor_x, game_state.cursor_y = snapshot.cursor
+    game_state._bump_version()
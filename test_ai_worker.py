@@ -0,0 +1,143 @@
+import random
+import threading
+import time
+
+import pytest
+
+from actions import legal_actions, MoveAction
+from ai_worker import AIWorker
+from chunked_terrain import ChunkedTerrain, write_terrain_file
+from config_loader import load_config
+from game_state import GameState
+from grid import Grid
+
+
+class GatedAI:
+    """Moves one enemy unit, then waits on a gate before moving the rest."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+
+    def take_turn(self, game_state, units, opponents):
+        for i, unit in enumerate(list(units)):
+            if i == 1:
+                self.gate.wait(5)
+            move = next(action for action in legal_actions(game_state, unit) if isinstance(action, MoveAction))
+            game_state.apply(move)
+
+
+def make_game():
+    config = load_config()
+    game_state = GameState(Grid(config, 0), config, 0, verbose=False, seed=1)
+    game_state.enemy_ai = GatedAI()
+    worker = game_state.ai_worker = AIWorker(game_state)
+    return game_state, worker
+
+
+def enemy_positions(game_state):
+    return sorted((unit.x, unit.y) for unit in game_state.enemy_units)
+
+
+def update_until(game_state, condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the worker"
+        game_state.update()
+        time.sleep(0.001)
+
+
+def test_cancel_mid_turn_ends_the_turn():
+    game_state, worker = make_game()
+    start = enemy_positions(game_state)
+    game_state.end_player_turn()
+
+    update_until(game_state, lambda: enemy_positions(game_state) != start)
+    moved = enemy_positions(game_state)
+    worker.cancel()
+
+    assert game_state.current_turn == "player"
+    assert not worker.running
+
+    # The cancelled thread wakes up and exits without its later moves being applied
+    thread = worker._retiring
+    game_state.enemy_ai.gate.set()
+    thread.join(5)
+    game_state.update()
+    assert enemy_positions(game_state) == moved
+    assert game_state.current_turn == "player"
+    assert not worker.running
+
+
+def test_next_turn_waits_for_cancelled_thread():
+    game_state, worker = make_game()
+    start = enemy_positions(game_state)
+    game_state.end_player_turn()
+    update_until(game_state, lambda: enemy_positions(game_state) != start)
+    worker.cancel()
+
+    game_state.end_player_turn()
+    game_state.update()
+    assert not worker.running
+
+    game_state.enemy_ai.gate.set()
+    update_until(game_state, lambda: game_state.current_turn == "player")
+    worker.close()
+
+
+def test_game_over_during_enemy_turn_ends_the_turn():
+    game_state, worker = make_game()
+    start = enemy_positions(game_state)
+    game_state.end_player_turn()
+    update_until(game_state, lambda: enemy_positions(game_state) != start)
+
+    # Stand in for a streamed kill that wipes out the player side
+    for unit in list(game_state.player_units):
+        game_state.grid.remove_unit(unit.x, unit.y)
+    game_state.update()
+
+    assert game_state.get_winner() == "enemy"
+    assert game_state.current_turn == "player"
+    assert not worker.running
+    game_state.enemy_ai.gate.set()
+    worker.close()
+
+
+def play_enemy_turn(game_state):
+    game_state.end_player_turn()
+    update_until(game_state, lambda: game_state.current_turn == "player")
+    return [(unit.x, unit.y, unit.current_hp, unit.current_move_points) for unit in game_state.units]
+
+
+def test_worker_plans_on_explicit_chunked_terrain(tmp_path):
+    config = load_config()
+    names = list(config['terrain_types'])
+    rng = random.Random(4)
+    rows = [bytes(rng.choice([names.index('plains'), names.index('forest'), names.index('hill')])
+                  for _ in range(10)) for _ in range(8)]
+    # Different terrain from the level layout, so a shadow built from the config would plan wrongly
+    path = str(tmp_path / "terrain.tbst")
+    write_terrain_file(path, 10, 8, names, rows, chunk_size=4)
+
+    def make(worker):
+        game_state = GameState(Grid(config, 0, terrain=ChunkedTerrain(path)), config, 0, verbose=False, seed=9)
+        if worker:
+            game_state.ai_worker = AIWorker(game_state)
+        return game_state
+
+    threaded = make(True)
+    assert play_enemy_turn(threaded) == play_enemy_turn(make(False))
+    shadow_grid = threaded.ai_worker._shadow.grid
+    assert [shadow_grid.cell_costs[i] for i in range(80)] == [threaded.grid.cell_costs[i] for i in range(80)]
+    threaded.ai_worker.close()
+
+
+def test_worker_keeps_unit_table_mode():
+    pytest.importorskip("numpy")
+    from unit_table import TableUnit, UnitTable
+
+    config = load_config()
+    game_state = GameState(Grid(config, 0), config, 0, verbose=False, unit_table=UnitTable(), seed=2)
+    worker = game_state.ai_worker = AIWorker(game_state)
+    play_enemy_turn(game_state)
+    assert all(isinstance(unit, TableUnit) for unit in worker._shadow.units)
+    worker.close()
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from ai import FlowFieldAI
+from chunked_terrain import write_terrain_file
+from config_loader import load_config
+from game_state import GameState
+from grid import Grid
+from mcts import MCTSAI
+
+SIZE = 400
+CHUNK = 16
+
+
+def chunked_game(tmp_path):
+    config = load_config()
+    names = list(config['terrain_types'])
+    passable = [names.index(name) for name in ('plains', 'forest', 'hill')]
+    rng = random.Random(1)
+    path = str(tmp_path / "world.tbst")
+    write_terrain_file(path, SIZE, SIZE, names,
+                       (bytes(rng.choice(passable) for _ in range(SIZE)) for _ in range(SIZE)), CHUNK)
+
+    config['levels'] = [{
+        'name': "Chunked",
+        'terrain_file': path,
+        'player_units': [[200, 200, "melee"], [202, 200, "ranged"], [250, 260, "artillery"]],
+        'enemy_units': [[210, 205, "melee"], [214, 206, "melee"], [60, 40, "ranged"]],
+    }]
+    return GameState(Grid(config, 0), config, 0, verbose=False, seed=3)
+
+
+def test_tactical_enemy_turn_only_loads_nearby_chunks(tmp_path):
+    game_state = chunked_game(tmp_path)
+    assert game_state.grid.is_chunked
+    start = [(unit.x, unit.y) for unit in game_state.enemy_units]
+
+    game_state.end_player_turn()
+    game_state.update()
+
+    assert game_state.current_turn == "player"
+    assert [(unit.x, unit.y) for unit in game_state.enemy_units] != start
+    total_chunks = (SIZE // CHUNK) ** 2
+    assert game_state.grid.terrain.get_stats()['loads'] < total_chunks // 4
+
+
+@pytest.mark.parametrize('controller', [FlowFieldAI, lambda: MCTSAI(time_budget=0.0, workers=1)])
+def test_whole_map_controllers_reject_chunked_terrain(tmp_path, controller):
+    game_state = chunked_game(tmp_path)
+    game_state.end_player_turn()
+    with pytest.raises(ValueError, match="chunked terrain"):
+        controller().take_turn(game_state, game_state.enemy_units, game_state.player_units)
@@ -0,0 +1,20 @@
+from config_loader import load_config
+from grid import Grid
+
+
+def test_compiled_terrain_ignored_after_layout_change():
+    config = load_config()
+    level = config['levels'][0]
+    level['layout'] = [row.replace('.', 'M') for row in level['layout']]
+
+    grid = Grid(config, 0)
+    assert grid.terrain == grid._parse_layout()
+
+
+def test_compiled_terrain_ignored_after_mapping_change():
+    config = load_config()
+    config['terrain_mapping']['.'] = 'hill'
+
+    grid = Grid(config, 0)
+    assert grid.terrain == grid._parse_layout()
+    assert grid.terrain_names[grid.terrain[grid.index(0, 0)]] == 'hill'
@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from config_loader import load_config
+from flow_field import INFINITY, FlowField
+from grid import Grid
+from unit import Unit
+
+WIDTH, HEIGHT = 24, 16
+
+
+def random_grid(rng):
+    config = load_config()
+    chars = '..........FFFHHM'
+    config['levels'] = [{
+        'name': "Random",
+        'layout': [''.join(rng.choice(chars) for _ in range(WIDTH)) for _ in range(HEIGHT)],
+    }]
+    return config, Grid(config, 0)
+
+
+def free_cell(rng, grid):
+    while True:
+        x, y = rng.randrange(WIDTH), rng.randrange(HEIGHT)
+        if grid.get_unit(x, y) is None:
+            return x, y
+
+
+def assert_matches_rebuild(field, grid):
+    fresh = FlowField(grid, [(i % WIDTH, i // WIDTH) for i in field.goals])
+    assert field.distances == fresh.distances
+
+    # Ties may be broken differently, so check each direction is a valid cheapest step
+    for i, distance in enumerate(field.distances):
+        n = field.next[i]
+        if i in field.goals or distance == INFINITY:
+            assert n == -1
+            continue
+        x, y, nx, ny = i % WIDTH, i // WIDTH, n % WIDTH, n // WIDTH
+        assert abs(x - nx) + abs(y - ny) == 1
+        assert not field._blocked(n)
+        assert field.distances[n] + grid.cell_costs[n] == distance
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_incremental_repair_matches_rebuild(seed):
+    rng = random.Random(seed)
+    config, grid = random_grid(rng)
+
+    goals = []
+    for _ in range(4):
+        x, y = free_cell(rng, grid)
+        grid.place_unit(Unit('melee', True, config), x, y)
+        goals.append((x, y))
+    movers = []
+    for _ in range(12):
+        unit = Unit('melee', False, config)
+        grid.place_unit(unit, *free_cell(rng, grid))
+        movers.append(unit)
+
+    field = FlowField(grid, goals)
+    field.attach()
+    for _ in range(60):
+        roll = rng.random()
+        if roll < 0.6 and movers:
+            unit = rng.choice(movers)
+            grid.move_unit(unit.x, unit.y, *free_cell(rng, grid))
+        elif roll < 0.75 and movers:
+            unit = movers.pop(rng.randrange(len(movers)))
+            grid.remove_unit(unit.x, unit.y)
+        elif roll < 0.85 and len(goals) > 1:
+            # A goal unit dies: it leaves the grid, then the field drops the goal
+            x, y = goals.pop(rng.randrange(len(goals)))
+            grid.remove_unit(x, y)
+            field.remove_goal(x, y)
+        else:
+            unit = Unit('melee', False, config)
+            grid.place_unit(unit, *free_cell(rng, grid))
+            movers.append(unit)
+        assert_matches_rebuild(field, grid)
+    field.detach()
@@ -0,0 +1,144 @@
+import random
+
+import pytest
+
+from config_loader import load_config
+from grid import Grid
+from hpa import HierarchicalPathfinder
+from pathfinding import find_path
+from unit import Unit
+
+SIZE = 64
+SECTOR = 8
+# HPA* routes through sector entrances, so they may cost somewhat more than optimal
+MAX_OVERHEAD = 1.5
+
+
+def make_grid(layout, units=()):
+    config = load_config()
+    config['levels'] = [{'name': "Test", 'layout': layout}]
+    grid = Grid(config, 0)
+    for x, y in units:
+        grid.place_unit(Unit('melee', False, config), x, y)
+    return config, grid
+
+
+def random_grid(rng, blockers=300):
+    layout = [''.join(rng.choice('.....FFHM') for _ in range(SIZE)) for _ in range(SIZE)]
+    cells = rng.sample([(x, y) for x in range(SIZE) for y in range(SIZE)], blockers)
+    return make_grid(layout, cells)
+
+
+def free_cell(rng, grid):
+    while True:
+        x, y = rng.randrange(SIZE), rng.randrange(SIZE)
+        if grid.get_unit(x, y) is None:
+            return x, y
+
+
+def check_path(grid, start, target, cost, path):
+    """The path is contiguous, only enters free cells (or the target) and costs what was reported."""
+    assert path[-1] == target
+    total = 0
+    x, y = start
+    for nx, ny in path:
+        assert abs(nx - x) + abs(ny - y) == 1
+        assert 0 <= nx < grid.width and 0 <= ny < grid.height
+        assert grid.get_unit(nx, ny) is None or (nx, ny) == target
+        total += grid.cell_costs[grid.index(nx, ny)]
+        x, y = nx, ny
+    assert total == cost
+
+
+def check_queries(rng, grid, pathfinder, count=25):
+    checked = 0
+    while checked < count:
+        start, target = free_cell(rng, grid), free_cell(rng, grid)
+        if abs(start[0] - target[0]) + abs(start[1] - target[1]) <= 2 * SECTOR:
+            continue  # Handed straight to find_path
+        optimal, _ = find_path(grid, *start, *target)
+        cost, path = pathfinder.find_path(*start, *target)
+        if optimal == float('inf'):
+            assert path is None
+        else:
+            check_path(grid, start, target, cost, path)
+            assert optimal <= cost <= optimal * MAX_OVERHEAD
+        checked += 1
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_paths_are_valid_and_near_optimal(seed):
+    rng = random.Random(seed)
+    _config, grid = random_grid(rng)
+    pathfinder = HierarchicalPathfinder(grid, SECTOR)
+    check_queries(rng, grid, pathfinder)
+    pathfinder.close()
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_paths_stay_valid_after_units_move(seed):
+    rng = random.Random(seed)
+    _config, grid = random_grid(rng)
+    pathfinder = HierarchicalPathfinder(grid, SECTOR)
+    check_queries(rng, grid, pathfinder, 5)
+
+    units = list(grid.unit_index.team(False))
+    for _ in range(5):
+        for unit in rng.sample(units, 40):
+            grid.move_unit(unit.x, unit.y, *free_cell(rng, grid))
+        check_queries(rng, grid, pathfinder, 5)
+    pathfinder.close()
+
+
+def test_entrances_follow_free_runs_on_borders():
+    # Two 4x4 sectors side by side; the border is between x=3 and x=4
+    _config, grid = make_grid(['.' * 8] * 4, [(4, 1)])
+    pathfinder = HierarchicalPathfinder(grid, 4)
+    pathfinder._refresh()
+
+    width = grid.width
+    crossings = sorted((a % width, a // width, b % width, b // width)
+                       for a, b in pathfinder._border_crossings[(0, 1)])
+    # (4, 1) splits the border into the runs y=0 and y=2..3, each crossed in its middle
+    assert crossings == [(3, 0, 4, 0), (3, 3, 4, 3)]
+    assert pathfinder.nodes[0] == {grid.index(3, 0), grid.index(3, 3)}
+    assert pathfinder.nodes[1] == {grid.index(4, 0), grid.index(4, 3)}
+
+
+def test_long_runs_get_a_crossing_at_each_end():
+    _config, grid = make_grid(['.' * 16] * 8)
+    pathfinder = HierarchicalPathfinder(grid, 8)
+    pathfinder._refresh()
+    ys = sorted(a // grid.width for a, _b in pathfinder._border_crossings[(0, 1)])
+    assert ys == [0, 7]
+
+
+def test_sector_costs_are_computed_lazily_and_invalidated():
+    rng = random.Random(7)
+    config, grid = random_grid(rng, blockers=0)
+    pathfinder = HierarchicalPathfinder(grid, SECTOR)
+    sectors = pathfinder.columns * pathfinder.rows
+
+    # A route along the top row only needs the sectors near it
+    cost, path = pathfinder.find_path(0, 0, SIZE - 1, 0)
+    check_path(grid, (0, 0), (SIZE - 1, 0), cost, path)
+    bottom_right = sectors - 1
+    assert bottom_right in pathfinder._dirty_sectors
+    assert pathfinder.sector_of(0, 0) not in pathfinder._dirty_sectors
+    assert not pathfinder._dirty_borders
+
+    # Occupancy changes mark the sector, and the borders the cell lies on, for rebuilding
+    grid.place_unit(Unit('melee', False, config), SECTOR - 1, 3)
+    assert pathfinder.sector_of(SECTOR - 1, 3) in pathfinder._dirty_sectors
+    assert (0, 1) in pathfinder._dirty_borders
+
+    # So does an explicit invalidate() after a terrain change
+    pathfinder.invalidate(3 * SECTOR, 2 * SECTOR)
+    below = pathfinder.sector_of(3 * SECTOR, 2 * SECTOR)
+    assert below in pathfinder._dirty_sectors
+    assert (below - pathfinder.columns, below) in pathfinder._dirty_borders
+
+    cost, path = pathfinder.find_path(0, 0, SIZE - 1, 0)
+    check_path(grid, (0, 0), (SIZE - 1, 0), cost, path)
+    assert cost <= find_path(grid, 0, 0, SIZE - 1, 0)[0] * MAX_OVERHEAD
+    pathfinder.close()
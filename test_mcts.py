@@ -0,0 +1,17 @@
+from config_loader import load_config
+from game_state import GameState
+from grid import Grid
+from mcts import MCTSAI
+
+
+def test_zero_budget_still_acts():
+    config = load_config()
+    game_state = GameState(Grid(config, 0), config, 0, verbose=False, seed=1)
+    game_state.end_player_turn()
+    start = {unit: (unit.x, unit.y) for unit in game_state.enemy_units}
+
+    ai = MCTSAI(time_budget=0.0, workers=1)
+    ai.take_turn(game_state, game_state.enemy_units, game_state.player_units)
+
+    assert ai.last_stats['iterations'] >= 1
+    assert any((unit.x, unit.y) != start[unit] for unit in game_state.enemy_units)
@@ -0,0 +1,59 @@
+import struct
+
+from config_loader import load_config
+from game_state import GameState
+from grid import Grid
+from replay import FORMAT_VERSION, HEADER, MAGIC, OP_MOVE, ReplayPlayer, ReplayRecorder, decode
+from simulation import play_match
+
+
+def test_recorded_match_replays_identically():
+    config = load_config()
+    recorder = ReplayRecorder()
+    result = play_match(config, 0, 3, recorder=recorder)
+
+    game_state = ReplayPlayer(config, recorder.to_bytes()).play_to_end()
+    assert game_state.get_winner() == result.winner
+    assert game_state.turn_number == result.turns
+
+
+def test_fractional_costs_replay_exactly():
+    config = load_config()
+    config['terrain_types']['plains']['movement_cost'] = 1.5
+    recorder = ReplayRecorder()
+    result = play_match(config, 0, 5, recorder=recorder, max_turns=3)
+
+    player = ReplayPlayer(config, recorder.to_bytes())
+    costs = [fields[-1] for opcode, *fields in player.actions if opcode == OP_MOVE]
+    assert any(cost != int(cost) for cost in costs)
+    assert player.play_to_end().turn_number == result.turns
+
+
+def test_large_coordinates_round_trip():
+    recorder = ReplayRecorder()
+    recorder.record_move(70000, 1500, 99999, 2.25)
+    _level, _seed, actions = decode(recorder.to_bytes())
+    assert actions == [(OP_MOVE, 70000, 1500, 99999, 2.25)]
+
+
+def test_version_1_replays_still_decode():
+    data = HEADER.pack(MAGIC, 1, 0, 7) + bytes([OP_MOVE]) + struct.pack('<HHHH', 2, 3, 4, 1)
+    assert FORMAT_VERSION != 1
+    assert decode(data) == (0, 7, [(OP_MOVE, 2, 3, 4, 1)])
+
+
+def test_recorded_undo_replays():
+    config = load_config()
+    recorder = ReplayRecorder()
+    game_state = GameState(Grid(config, 0), config, 0, verbose=False, seed=2, undo=True)
+    recorder.attach(game_state)
+    unit = game_state.units[0]
+    start = (unit.x, unit.y)
+    game_state.select_unit_at(*start)
+    assert game_state.move_selected_unit(start[0], start[1] + 1)
+    assert game_state.undo()
+
+    player = ReplayPlayer(config, recorder.to_bytes())
+    assert player.game_state.undo_enabled
+    replayed = player.play_to_end().units[0]
+    assert (replayed.x, replayed.y) == start
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from config_loader import load_config
+from game_state import GameState
+from grid import Grid
+from simulation import play_match
+from unit_table import TableUnit, UnitTable
+
+
+def test_full_game_matches_plain_units():
+    config = load_config()
+    for seed in range(3):
+        table_result = play_match(config, 0, seed, unit_table=True)
+        assert table_result == play_match(config, 0, seed)
+        assert table_result.winner is not None
+
+
+def test_apply_damage_removes_killed_units():
+    config = load_config()
+    table = UnitTable()
+    game_state = GameState(Grid(config, 0), config, 0, verbose=False, unit_table=table, seed=1)
+    assert all(isinstance(unit, TableUnit) for unit in game_state.units)
+
+    enemies = list(game_state.enemy_units)
+    rows = [unit._row for unit in enemies]
+    killed = table.apply_damage(game_state, rows + rows, [unit.max_hp for unit in enemies] * 2)
+
+    assert sorted(killed, key=id) == sorted(enemies, key=id)
+    assert not game_state.enemy_units
+    assert all(game_state.grid.get_unit(unit.x, unit.y) is None for unit in enemies)
+    assert game_state.get_winner() == "player"
+
+
+def test_fractional_move_costs_match_plain_units():
+    config = load_config()
+    config['terrain_types']['plains']['movement_cost'] = 1.5
+    for seed in range(5):
+        assert play_match(config, 0, seed, unit_table=True) == play_match(config, 0, seed)
+
+    unit = UnitTable().create_unit('melee', True, config)
+    unit.move(1.5)
+    assert unit.current_move_points == unit.max_move_points - 1.5
@@ -0,0 +1,44 @@
+# text_cache.py
+from collections import OrderedDict
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces keyed on (text, color, font).
+
+    Surfaces handed out are shared between callers, so they must be treated
+    as read-only (blit them, don't fill or set_alpha them).
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (text, tuple(color), font, antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            # Drop the least recently used entry
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._surfaces),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -1,25 +1,86 @@
 # unit.py
+from pathfinding import cells_in_range, compute_reachability
+
+class UnitType:
+    """Static stats shared by every unit of one type."""
+    __slots__ = ('type_id', 'name', 'strength', 'range', 'max_hp', 'max_move_points', 'color', 'description')
+
+    def __init__(self, type_id, name, unit_config):
+        self.type_id = type_id
+        self.name = name
+        self.strength = unit_config['strength']
+        self.range = unit_config['range']
+        self.max_hp = unit_config['hp']
+        self.max_move_points = unit_config['move']
+        self.color = tuple(unit_config['color'])
+        self.description = unit_config['description']
+
+
+def get_unit_types(config):
+    """Return the shared {name: UnitType} table for a config, built once per config.
+
+    The table is kept on the config itself (with the unit_types dict it was
+    built from, so swapping that dict rebuilds it) and goes away with it.
+    """
+    unit_types = config['unit_types']
+    entry = config.get('_unit_type_table')
+    if entry is None or entry[0] is not unit_types:
+        table = {name: UnitType(type_id, name, unit_config)
+                 for type_id, (name, unit_config) in enumerate(unit_types.items())}
+        entry = config['_unit_type_table'] = (unit_types, table)
+    return entry[1]
+
+
 class Unit:
+    # Per-unit state only; static stats live in the shared UnitType (self.stats)
+    __slots__ = ('unit_type', 'stats', 'is_player', 'x', 'y', 'current_hp', 'current_move_points',
+                 'has_moved', 'has_attacked', '_reachability', '_reachability_key')
+
     def __init__(self, unit_type, is_player, config, x=0, y=0):
         self.unit_type = unit_type
+        self.stats = get_unit_types(config)[unit_type]
         self.is_player = is_player
         self.x = x
         self.y = y
         
-        # Load stats from config
-        unit_config = config['unit_types'][unit_type]
-        self.strength = unit_config['strength']
-        self.range = unit_config['range']
-        self.max_hp = unit_config['hp']
-        self.current_hp = self.max_hp
-        self.max_move_points = unit_config['move']
-        self.current_move_points = self.max_move_points  # Track remaining movement points
-        self.color = tuple(unit_config['color'])
-        self.description = unit_config['description']
+        self.current_hp = self.stats.max_hp
+        self.current_move_points = self.stats.max_move_points  # Track remaining movement points
         
         # Turn state
         self.has_moved = False  # Now indicates if unit moved at all this turn
         self.has_attacked = False
+        
+        # Cached movement search, see get_reachability()
+        self._reachability = None
+        self._reachability_key = None
+    
+    @property
+    def type_id(self):
+        return self.stats.type_id
+    
+    @property
+    def strength(self):
+        return self.stats.strength
+    
+    @property
+    def range(self):
+        return self.stats.range
+    
+    @property
+    def max_hp(self):
+        return self.stats.max_hp
+    
+    @property
+    def max_move_points(self):
+        return self.stats.max_move_points
+    
+    @property
+    def color(self):
+        return self.stats.color
+    
+    @property
+    def description(self):
+        return self.stats.description
     
     def is_alive(self):
         return self.current_hp > 0
@@ -72,36 +133,14 @@ class Unit:
             self.current_hp = 0
             
     def get_attack_range_cells(self, grid):
-        """Return a list of (x,y) coordinates within attack range."""
-        cells = []
-        
-        # Check all cells within attack range (Manhattan distance)
-        for r in range(1, self.range + 1):
-            for dx in range(-r, r + 1):
-                # Calculate allowable dy values for this dx (to maintain Manhattan distance)
-                dy_range = r - abs(dx)
-                for dy in range(-dy_range, dy_range + 1):
-                    nx, ny = self.x + dx, self.y + dy
-                    
-                    # Skip if out of bounds
-                    if not (0 <= nx < grid.width and 0 <= ny < grid.height):
-                        continue
-                    
-                    # Add to attack range cells
-                    cells.append((nx, ny))
-        
-        return cells
+        """Return the set of (x,y) coordinates within attack range."""
+        return cells_in_range(self.x, self.y, self.range, grid.width, grid.height)
 
     def get_valid_attack_targets(self, grid, enemy_units):
         """Return a list of enemy units that can be attacked."""
-        targets = []
-        attack_range_cells = self.get_attack_range_cells(grid)
-        
-        for enemy in enemy_units:
-            if enemy.is_alive() and (enemy.x, enemy.y) in attack_range_cells:
-                targets.append(enemy)
-                
-        return targets
+        # Only units near this one are looked at, not the whole enemy army
+        return [enemy for enemy in grid.get_units_within(self.x, self.y, self.range, not self.is_player)
+                if enemy.is_alive() and enemy in enemy_units]
     
     def reset_turn(self):
         self.has_moved = False
@@ -120,118 +159,44 @@ class Unit:
             'status': "Player" if self.is_player else "Enemy"
         }
     
+    def get_reachability(self, grid):
+        """Return the Reachability for this unit's remaining move points.
+
+        The result is reused until the board or the unit's position or move
+        points change.
+        """
+        key = (grid, grid.version, self.x, self.y, self.current_move_points)
+        if self._reachability_key != key:
+            self._reachability = compute_reachability(grid, self.x, self.y, self.current_move_points)
+            self._reachability_key = key
+        return self._reachability
+    
     def get_move_range_cells(self, grid):
         """Return a list of (x,y) coordinates within movement range based on remaining move points."""
-        cells = []
-        # Use breadth-first search with movement costs
-        visited = {(self.x, self.y): 0}  # (x, y): movement_cost
-        queue = [(self.x, self.y, 0)]  # (x, y, accumulated_cost)
-        
-        while queue:
-            x, y, cost = queue.pop(0)
-            
-            # Don't add the unit's own position to the move range
-            if (x, y) != (self.x, self.y):
-                cells.append((x, y))
-            
-            # Check all adjacent cells
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                nx, ny = x + dx, y + dy
-                
-                # Skip if out of bounds
-                if not (0 <= nx < grid.width and 0 <= ny < grid.height):
-                    continue
-                    
-                # Skip if cell has a unit
-                cell = grid.get_cell(nx, ny)
-                if cell and cell['unit'] is not None:
-                    continue
-                
-                # Get terrain movement cost
-                terrain = cell['terrain']
-                move_cost = grid.terrain_types[terrain]['movement_cost']
-                
-                # Calculate the new total cost
-                new_cost = cost + move_cost
-                
-                # If we can move to this cell within our remaining move points
-                # and if this path is cheaper than any previously found path to this cell
-                if (new_cost <= self.current_move_points and 
-                    ((nx, ny) not in visited or new_cost < visited[(nx, ny)])):
-                    visited[(nx, ny)] = new_cost
-                    queue.append((nx, ny, new_cost))
-        
-        return cells
+        return self.get_reachability(grid).cells()
     
     def get_movement_cost_to(self, grid, target_x, target_y):
         """Calculate the movement cost to reach a specific cell."""
         # If target is the current position, cost is 0
         if target_x == self.x and target_y == self.y:
             return 0
-            
-        # Use Dijkstra's algorithm to find the shortest path
-        import heapq
         
-        # Priority queue of (cost, x, y)
-        queue = [(0, self.x, self.y)]
-        # Dictionary to store the shortest distance to each cell
-        distances = {(self.x, self.y): 0}
+        # Anything within the remaining move points is already in the reachability map
+        reachability = self.get_reachability(grid)
+        if (target_x, target_y) in reachability:
+            return reachability.cost_to(target_x, target_y)
         
-        while queue:
-            cost, x, y = heapq.heappop(queue)
-            
-            # If we reached the target, return the cost
-            if x == target_x and y == target_y:
-                return cost
-                
-            # If we've found a better path to this cell already, skip
-            if cost > distances.get((x, y), float('inf')):
-                continue
-                
-            # Check all adjacent cells
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                nx, ny = x + dx, y + dy
-                
-                # Skip if out of bounds
-                if not (0 <= nx < grid.width and 0 <= ny < grid.height):
-                    continue
-                    
-                # Skip if cell has a unit (unless it's the target)
-                cell = grid.get_cell(nx, ny)
-                if cell and cell['unit'] is not None and (nx, ny) != (target_x, target_y):
-                    continue
-                
-                # Get terrain movement cost
-                terrain = cell['terrain']
-                move_cost = grid.terrain_types[terrain]['movement_cost']
-                
-                # Calculate the new total cost
-                new_cost = cost + move_cost
-                
-                # If this is a better path, update and add to queue
-                if new_cost < distances.get((nx, ny), float('inf')):
-                    distances[(nx, ny)] = new_cost
-                    heapq.heappush(queue, (new_cost, nx, ny))
-        
-        # If we couldn't find a path, return infinity
-        return float('inf')
+        # Out of range or occupied targets need a goal-directed search
+        return grid.path_cache.find(grid, self.x, self.y, target_x, target_y)[0]
     
-    def get_attack_range_cells(self, grid):
-        """Return a list of (x,y) coordinates within attack range."""
-        cells = []
-        
-        # Check all cells within attack range (Manhattan distance)
-        for r in range(1, self.range + 1):
-            for dx in range(-r, r + 1):
-                dy_range = r - abs(dx)
-                for dy in range(-dy_range, dy_range + 1):
-                    nx, ny = self.x + dx, self.y + dy
-                    
-                    # Skip if out of bounds
-                    if not (0 <= nx < grid.width and 0 <= ny < grid.height):
-                        continue
-                    
-                    # Add to attack range cells
-                    cells.append((nx, ny))
-        
-        return cells
+    def get_path_to(self, grid, target_x, target_y):
+        """Return the (x,y) steps to a cell, or None if it can't be reached.
+
+        Cells within move range come from the reachability search; anything
+        further away is routed with A* (the unit may need several turns).
+        """
+        reachability = self.get_reachability(grid)
+        if (target_x, target_y) in reachability:
+            return reachability.path_to(target_x, target_y)
+        path = grid.path_cache.find(grid, self.x, self.y, target_x, target_y)[1]
+        return list(path) if path is not None else None
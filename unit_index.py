@@ -0,0 +1,141 @@
+# unit_index.py
+class UnitSet:
+    """Insertion-ordered set of units with O(1) add, remove and membership.
+
+    Iteration order is the order units were added, so AI decisions stay
+    deterministic. Don't add or remove while iterating; iterate a list()
+    copy instead.
+    """
+    __slots__ = ('_units',)
+
+    def __init__(self, units=()):
+        self._units = dict.fromkeys(units)
+
+    def add(self, unit):
+        self._units[unit] = None
+
+    def reset(self, units):
+        """Replace the contents (and order) in place."""
+        self._units = dict.fromkeys(units)
+
+    def discard(self, unit):
+        self._units.pop(unit, None)
+
+    def __contains__(self, unit):
+        return unit in self._units
+
+    def __iter__(self):
+        return iter(self._units)
+
+    def __len__(self):
+        return len(self._units)
+
+    def __repr__(self):
+        return f"UnitSet({list(self._units)!r})"
+
+
+class UnitIndex:
+    """Spatial index of the units on a grid.
+
+    Units are kept in per-team UnitSets and in square buckets of
+    bucket_size cells, so "units within distance r of (x, y)" only visits
+    the buckets overlapping that area instead of every unit on the map.
+    The position -> unit lookup itself is Grid.occupants.
+    """
+
+    def __init__(self, width, height, bucket_size=8):
+        self.width = width
+        self.height = height
+        self.bucket_size = bucket_size
+        self.buckets_wide = (width + bucket_size - 1) // bucket_size
+        self.teams = {True: UnitSet(), False: UnitSet()}
+        self._buckets = {}  # bucket key -> UnitSet
+        self._bucket_of = {}  # unit -> bucket key
+
+    def _bucket_key(self, x, y):
+        return (y // self.bucket_size) * self.buckets_wide + x // self.bucket_size
+
+    def add(self, unit, x, y):
+        """Index unit at (x, y), moving it if it was already indexed elsewhere."""
+        key = self._bucket_key(x, y)
+        old_key = self._bucket_of.get(unit)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self._buckets[old_key].discard(unit)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = UnitSet()
+        bucket.add(unit)
+        self._bucket_of[unit] = key
+        self.teams[unit.is_player].add(unit)
+
+    def remove(self, unit):
+        key = self._bucket_of.pop(unit, None)
+        if key is not None:
+            self._buckets[key].discard(unit)
+            self.teams[unit.is_player].discard(unit)
+
+    def move(self, unit, x, y):
+        self.add(unit, x, y)
+
+    def ordering(self, ids):
+        """Return the iteration order of every team and bucket as unit IDs (ids maps unit -> ID)."""
+        teams = {side: [ids[unit] for unit in units] for side, units in self.teams.items()}
+        buckets = {key: [ids[unit] for unit in bucket] for key, bucket in self._buckets.items() if bucket}
+        return teams, buckets
+
+    def reorder(self, ordering, units):
+        """Take on another index's iteration order, from its ordering().
+
+        Both indexes must hold the same units at the same cells; units maps
+        an ID to this index's unit. Used to make a copy of the game iterate
+        units exactly like the original, so AI tie-breaks agree.
+        """
+        teams, buckets = ordering
+        for side, ids in teams.items():
+            self.teams[side].reset(units[i] for i in ids)
+        for key, ids in buckets.items():
+            self._buckets[key].reset(units[i] for i in ids)
+
+    def team(self, is_player):
+        """Live UnitSet of every indexed unit on one side."""
+        return self.teams[is_player]
+
+    def units_within(self, x, y, radius, is_player=None):
+        """Return the units within Manhattan distance radius of (x, y), optionally of one side."""
+        size = self.bucket_size
+        min_bx = max(0, x - radius) // size
+        max_bx = min(self.width - 1, x + radius) // size
+        min_by = max(0, y - radius) // size
+        max_by = min(self.height - 1, y + radius) // size
+
+        found = []
+        buckets = self._buckets
+        for by in range(min_by, max_by + 1):
+            for bx in range(min_bx, max_bx + 1):
+                bucket = buckets.get(by * self.buckets_wide + bx)
+                if not bucket:
+                    continue
+                for unit in bucket:
+                    if is_player is not None and unit.is_player != is_player:
+                        continue
+                    if abs(unit.x - x) + abs(unit.y - y) <= radius:
+                        found.append(unit)
+        return found
+
+    def units_in_rect(self, x0, y0, x1, y1):
+        """Return the units with x0 <= x < x1 and y0 <= y < y1."""
+        size = self.bucket_size
+        found = []
+        buckets = self._buckets
+        for by in range(max(0, y0) // size, (min(self.height, y1) - 1) // size + 1):
+            for bx in range(max(0, x0) // size, (min(self.width, x1) - 1) // size + 1):
+                bucket = buckets.get(by * self.buckets_wide + bx)
+                if not bucket:
+                    continue
+                for unit in bucket:
+                    if x0 <= unit.x < x1 and y0 <= unit.y < y1:
+                        found.append(unit)
+        return found
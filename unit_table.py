@@ -0,0 +1,170 @@
+# unit_table.py
+"""Struct-of-arrays unit storage for large armies.
+
+A UnitTable keeps the mutable state of many units in parallel NumPy arrays.
+Units created through it are TableUnit rows: they behave exactly like Unit,
+but their position, HP, move points and turn flags live in the table, so
+whole-side resets, batched damage and range checks run as vectorized array
+operations instead of Python loops over GameState.units.
+
+NumPy is an optional dependency: this module imports without it, but
+creating a UnitTable raises ImportError. Nothing else in the game needs it;
+`python simulation.py --unit-table` plays matches on a table.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from unit import Unit
+
+
+class UnitTable:
+    def __init__(self, capacity=64):
+        if np is None:
+            raise ImportError("UnitTable requires NumPy (pip install numpy)")
+        self.count = 0
+        self.units = []  # Row -> TableUnit
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        def resize(name, dtype):
+            new = np.zeros(capacity, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+        resize('_x', np.int32)
+        resize('_y', np.int32)
+        resize('_hp', np.int32)
+        # Terrain costs may be fractional, so move points are doubles like Grid.cell_costs
+        resize('_move_points', np.float64)
+        resize('_max_move_points', np.float64)
+        resize('_range', np.int32)
+        resize('_type_id', np.int16)
+        resize('_is_player', np.bool_)
+        resize('_has_moved', np.bool_)
+        resize('_has_attacked', np.bool_)
+        self.capacity = capacity
+
+    def create_unit(self, unit_type, is_player, config, x=0, y=0):
+        """Create a TableUnit stored in the next free row (same signature as Unit)."""
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+        row = self.count
+        self.count += 1
+
+        unit = TableUnit(self, row, unit_type, is_player, config, x, y)
+        # Static stats are mirrored into the table so bulk operations can use them
+        self._max_move_points[row] = unit.max_move_points
+        self._range[row] = unit.range
+        self._type_id[row] = unit.type_id
+        self._is_player[row] = is_player
+        self.units.append(unit)
+        return unit
+
+    # Views over the rows in use
+    @property
+    def x(self):
+        return self._x[:self.count]
+
+    @property
+    def y(self):
+        return self._y[:self.count]
+
+    @property
+    def hp(self):
+        return self._hp[:self.count]
+
+    @property
+    def move_points(self):
+        return self._move_points[:self.count]
+
+    @property
+    def is_player(self):
+        return self._is_player[:self.count]
+
+    def alive_mask(self, is_player=None):
+        """Boolean mask of living rows, optionally restricted to one side."""
+        mask = self.hp > 0
+        if is_player is not None:
+            mask &= self.is_player == is_player
+        return mask
+
+    def reset_side(self, is_player=None):
+        """Vectorized Unit.reset_turn for every living unit of a side (or of both sides)."""
+        mask = self.alive_mask(is_player)
+        n = self.count
+        self._has_moved[:n][mask] = False
+        self._has_attacked[:n][mask] = False
+        self._move_points[:n][mask] = self._max_move_points[:n][mask]
+
+    def apply_damage(self, game_state, rows, amounts):
+        """Subtract amounts from the HP of rows (repeated rows accumulate), clamping at 0.
+
+        Units this kills are taken off the board through grid.remove_unit,
+        as GameState.resolve_attack does, so the grid, the unit index and the
+        win check all see them go. Returns the killed units.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        hp = self._hp[:self.count]
+        was_alive = hp[rows] > 0
+        np.subtract.at(hp, rows, amounts)
+        hp[rows] = np.maximum(hp[rows], 0)
+        game_state._bump_version()
+
+        killed = np.unique(rows[was_alive & (hp[rows] == 0)])
+        grid = game_state.grid
+        units = [self.units[row] for row in killed]
+        for unit in units:
+            grid.remove_unit(unit.x, unit.y)
+        return units
+
+    def rows_in_range(self, x, y, radius, is_player=None):
+        """Indices of living rows within Manhattan distance radius of (x, y)."""
+        mask = self.alive_mask(is_player)
+        mask &= (np.abs(self.x - x) + np.abs(self.y - y)) <= radius
+        return np.flatnonzero(mask)
+
+    def units_in_range(self, x, y, radius, is_player=None):
+        return [self.units[row] for row in self.rows_in_range(x, y, radius, is_player)]
+
+    def attack_targets(self, unit):
+        """Living opponents within unit's attack range."""
+        return self.units_in_range(unit.x, unit.y, unit.range, not unit.is_player)
+
+
+def _whole(value):
+    """Whole-number move points read back as ints, as a plain Unit holds them."""
+    return int(value) if value.is_integer() else value
+
+
+def _column(name, convert=None):
+    """Property that stores a Unit attribute in a UnitTable array."""
+    def get(self):
+        # item() hands back the plain Python value, not a NumPy scalar
+        value = getattr(self._table, name)[self._row].item()
+        return convert(value) if convert is not None else value
+
+    def set(self, value):
+        getattr(self._table, name)[self._row] = value
+
+    return property(get, set)
+
+
+class TableUnit(Unit):
+    """A Unit whose mutable state is one row of a UnitTable."""
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table, row, unit_type, is_player, config, x=0, y=0):
+        self._table = table
+        self._row = row
+        super().__init__(unit_type, is_player, config, x, y)
+
+    x = _column('_x')
+    y = _column('_y')
+    current_hp = _column('_hp')
+    current_move_points = _column('_move_points', _whole)
+    has_moved = _column('_has_moved')
+    has_attacked = _column('_has_attacked')